@@ -1,21 +1,107 @@
+from importlib import import_module
+from operator import attrgetter
+
 from anki.buildinfo import version
 from anki.hooks import wrap
 
 
+def _lazy(module: str, name: str):
+    """Returns a function that calls `name` from the add-on module `module`, which is only
+    imported on the first call. This keeps the add-on from slowing down the start of Anki."""
+
+    def call(*args):
+        return attrgetter(name)(import_module(module, __name__))(*args)
+
+    return call
+
+
 def hook_quiz():
     from aqt import gui_hooks
 
-    from .quiz import maobi_review_hook
-
-    gui_hooks.card_will_show.append(maobi_review_hook)
+    # Registered before the first card is shown
+    gui_hooks.profile_did_open.append(_lazy(".quiz", "register_web_exports"))
+    gui_hooks.card_will_show.append(_lazy(".quiz", "maobi_review_hook"))
 
 
 def hook_add_config_button():
     from aqt import gui_hooks
 
-    from .config import maobi_add_config_button_hook
+    gui_hooks.card_layout_will_show.append(
+        _lazy(".config", "maobi_add_config_button_hook")
+    )
+
+
+def hook_config_updated():
+    from aqt import mw
+
+    # The config is cached, so it needs to be replaced when the user edits it
+    mw.addonManager.setConfigUpdatedAction(
+        __name__, _lazy(".config", "MaobiConfig.reload")
+    )
+
+
+def hook_bridge():
+    from aqt import gui_hooks
+
+    gui_hooks.webview_did_receive_js_message.append(
+        _lazy(".bridge", "maobi_bridge_hook")
+    )
+
+
+def hook_prefetch():
+    from aqt import gui_hooks
+
+    # After answering a card, the next cards are loaded in the background
+    gui_hooks.reviewer_did_answer_card.append(_lazy(".prefetch", "maobi_prefetch_hook"))
+
+
+def hook_warm_up():
+    from aqt import gui_hooks
+
+    # The first card does not have to open the character data, see `warmup.py`
+    gui_hooks.profile_did_open.append(_lazy(".warmup", "maobi_warm_up"))
+
+
+def hook_tools_menu():
+    from aqt import mw
+    from aqt.qt import QAction, qconnect
+
+    actions = [
+        ("Maobi: Check character coverage", ".coverage", "maobi_check_coverage"),
+        (
+            "Maobi: Export character data to media folder",
+            ".export",
+            "maobi_export_bundles",
+        ),
+        ("Maobi: Show timings", ".timing", "maobi_show_timings"),
+        ("Maobi: Show mistakes", ".strokes", "maobi_show_mistakes"),
+    ]
+
+    for title, module, name in actions:
+        action = QAction(title, mw)
+        # `f` is bound per action, the `checked` argument of the signal is dropped
+        qconnect(action.triggered, lambda _=None, f=_lazy(module, name): f())
+        mw.form.menuTools.addAction(action)
+
+
+def hook_stroke_log():
+    from aqt import gui_hooks
+
+    # Write the buffered strokes before the profile is closed
+    gui_hooks.profile_will_close.append(_lazy(".strokes", "close_stroke_log"))
+
+
+def hook_character_store():
+    from aqt import gui_hooks
+
+    # Release the archive so that it is reopened for the next profile or after an update
+    close_character_store = _lazy(".store", "close_character_store")
+    gui_hooks.profile_will_close.append(close_character_store)
+    gui_hooks.addons_dialog_will_delete_addons.append(close_character_store)
 
-    gui_hooks.card_layout_will_show.append(maobi_add_config_button_hook)
+    # Only available in newer Anki versions
+    if hasattr(gui_hooks, "addon_manager_will_install_addon"):
+        gui_hooks.addon_manager_will_install_addon.append(close_character_store)
 
 
 version = tuple(int(p) for p in version.split("."))
@@ -31,3 +117,10 @@ if version < required_version:
 else:
     hook_quiz()
     hook_add_config_button()
+    hook_config_updated()
+    hook_character_store()
+    hook_stroke_log()
+    hook_prefetch()
+    hook_warm_up()
+    hook_bridge()
+    hook_tools_menu()
@@ -0,0 +1,86 @@
+import json
+
+from .store import get_character_store
+from .strokes import get_stroke_log
+from .timing import timings
+
+# Sent by `quiz.js` followed by the characters whose data it needs
+STREAM_COMMAND = "maobi:characters:"
+
+# Sent by `quiz.js` in debug mode followed by a batch of timings measured in the webview
+TIMINGS_COMMAND = "maobi:timings:"
+
+# Sent by `quiz.js` followed by a batch of written strokes, see `strokes.py`
+STROKES_COMMAND = "maobi:strokes:"
+
+
+def maobi_bridge_hook(handled: tuple, message: str, context) -> tuple:
+    """Answers requests of `quiz.js` for the data of characters that were not inlined into the
+    card. The result is passed to the callback of `pycmd`, which receives it asynchronously.
+
+    Returns:
+        (True, dict[str, str]) mapping each requested character to its character data, or
+        `handled` if the message is not for us.
+
+    """
+    if message.startswith(TIMINGS_COMMAND):
+        _record_client_timings(message[len(TIMINGS_COMMAND) :])
+        return True, None
+
+    if message.startswith(STROKES_COMMAND):
+        _record_strokes(message[len(STROKES_COMMAND) :])
+        return True, None
+
+    if not message.startswith(STREAM_COMMAND):
+        return handled
+
+    store = get_character_store()
+
+    result = {}
+    for c in dict.fromkeys(message[len(STREAM_COMMAND) :]):
+        character_data = store.get(c)
+        if character_data is not None:
+            result[c] = character_data
+
+    return True, result
+
+
+def _record_client_timings(payload: str):
+    """Records the timings measured by `quiz.js` as phases `client.*`, next to the phases of the
+    review hook. The payload is a JSON object `{"card": ..., "timings": [[name, ms], ...]}`, the
+    characters of the card are kept as label of the slowest durations."""
+    try:
+        batch = json.loads(payload)
+        label = str(batch["card"])
+        entries = list(batch["timings"])
+    except (ValueError, KeyError, TypeError):
+        return
+
+    for entry in entries:
+        if not isinstance(entry, list) or len(entry) != 2:
+            continue
+        name, duration_ms = entry
+        if isinstance(name, str) and isinstance(duration_ms, (int, float)):
+            timings.record(f"client.{name}", float(duration_ms), label)
+
+
+def _record_strokes(payload: str):
+    """Adds the strokes written in `quiz.js` to the stroke log. The payload is a JSON list of
+    `[character, stroke index, mistakes, hint shown, accepted]`."""
+    try:
+        strokes = json.loads(payload)
+    except ValueError:
+        return
+
+    if not isinstance(strokes, list):
+        return
+
+    stroke_log = get_stroke_log()
+    for entry in strokes:
+        if not isinstance(entry, list) or len(entry) != 5:
+            continue
+        character, stroke, mistakes, hint, accepted = entry
+        if not isinstance(character, str):
+            continue
+        if isinstance(stroke, int) and isinstance(mistakes, int):
+            stroke_log.add(character, stroke, mistakes, bool(hint), bool(accepted))
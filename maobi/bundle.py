@@ -0,0 +1,118 @@
+import json
+import os
+from collections import namedtuple
+from typing import Optional
+
+from aqt import mw
+
+from .config import DeckConfig
+from .store import get_character_store
+from .util import error
+
+PATH_MAOBI = os.path.dirname(os.path.realpath(__file__))
+PATH_BUNDLES = os.path.join(PATH_MAOBI, "user_files", "bundles.json")
+
+# Media files starting with an underscore are kept by Check Media and synced
+BUNDLE_PREFIX = "_maobi-"
+
+# A file in the media folder with the character data of `characters`, see `export.py`. `data` is
+# the version of the shipped data file it was built from, see `CharacterStore.data_version`.
+# `overlay` maps the characters whose data came from the overlay to the mtime of their file.
+Bundle = namedtuple("Bundle", ["file_name", "characters", "data", "overlay"])
+
+# The bundles of the current profile as (profile name, dict[(deck, template), Bundle])
+_bundles = None
+
+
+def get_bundle(config: DeckConfig) -> Optional[Bundle]:
+    """Returns the bundle exported for `config` in the current profile, if any. A bundle is
+    ignored once the shipped data or the overlay data of its characters changed, until it is
+    exported again."""
+    bundle = load_bundles().get((config.deck, config.template))
+    if bundle is None:
+        return None
+
+    store = get_character_store()
+    if store.data_version() != bundle.data:
+        return None
+    if store.overlay_mtimes(bundle.characters) != bundle.overlay:
+        return None
+
+    return bundle
+
+
+def load_bundles() -> dict:
+    """Returns the bundles of the current profile. The manifest is only read once per profile.
+
+    Returns:
+        dict[tuple[str, str], Bundle]: The bundle of each (deck, template).
+
+    """
+    global _bundles
+
+    profile = mw.pm.name
+    if _bundles is None or _bundles[0] != profile:
+        _bundles = (profile, _read_manifest().get(profile, {}))
+    return _bundles[1]
+
+
+def save_bundles(profile: str, bundles: dict):
+    """Replaces the bundles of `profile` in the manifest and in memory. The manifest is replaced
+    at once, so that cards shown meanwhile never read a partially written file."""
+    global _bundles
+
+    manifest = _read_manifest()
+    manifest[profile] = bundles
+
+    os.makedirs(os.path.dirname(PATH_BUNDLES), exist_ok=True)
+    path = PATH_BUNDLES + ".tmp"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                name: [
+                    {
+                        "deck": deck,
+                        "template": template,
+                        "file": bundle.file_name,
+                        "characters": "".join(sorted(bundle.characters)),
+                        "data": bundle.data,
+                        "overlay": bundle.overlay,
+                    }
+                    for (deck, template), bundle in profile_bundles.items()
+                ]
+                for name, profile_bundles in manifest.items()
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    os.replace(path, PATH_BUNDLES)
+
+    _bundles = (profile, bundles)
+
+
+def _read_manifest() -> dict:
+    """Reads the bundles of all profiles. An unreadable manifest is reported and treated as
+    empty, cards then get the character data inlined until the bundles are exported again."""
+    if not os.path.exists(PATH_BUNDLES):
+        return {}
+
+    try:
+        with open(PATH_BUNDLES, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        return {
+            profile: {
+                (e["deck"], e["template"]): Bundle(
+                    e["file"],
+                    frozenset(e["characters"]),
+                    e.get("data"),
+                    dict(e.get("overlay", {})),
+                )
+                for e in entries
+            }
+            for profile, entries in manifest.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        error(f"Ignoring the exported bundles, {PATH_BUNDLES} could not be read: {e}")
+        return {}
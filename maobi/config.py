@@ -6,6 +6,7 @@ from aqt import mw
 from aqt.clayout import CardLayout
 from aqt.qt import *
 
+from .grid import GridStyle
 from .util import debug, error
 
 GridType = namedtuple("GridType", ["name", "label"])
@@ -15,6 +16,8 @@ class GridTypes(Enum):
     NONE = GridType("none", "None")
     FIELD = GridType("field", "Field 田")
     RICE = GridType("rice", "Rice 米")
+    HUI = GridType("hui", "Hui 回")
+    NINE = GridType("nine", "Nine 九宫")
 
     @staticmethod
     def from_name(name: str) -> GridType:
@@ -39,6 +42,7 @@ class DeckConfig:
         leniency: int,
         enabled: bool,
         show_hint_after_misses: int,
+        variant_fallback: bool,
     ):
         self.deck = deck
         self.template = template
@@ -48,6 +52,7 @@ class DeckConfig:
         self.leniency = leniency
         self.enabled = enabled
         self.show_hint_after_misses = show_hint_after_misses
+        self.variant_fallback = variant_fallback
 
     def __hash__(self):
         # A config is unique per (deck,template,field combination). Other fields are neglected.
@@ -59,6 +64,68 @@ class DeckConfig:
         return False
 
 
+class DeckTrie:
+    """DeckTrie finds the DeckConfig of a deck among deck patterns. Patterns are deck names whose
+    segments (separated by `::`) can be `*`, which matches any single segment, e.g.
+    `Chinese::*::Writing`. Decks without a matching pattern use the config of their nearest
+    parent that has one.
+
+    If several patterns match, the most specific one wins: the one matching more segments of the
+    deck, then the one with a literal segment where the other has `*`, from left to right. A
+    lookup therefore only depends on the depth of the deck, not on the number of patterns.
+    """
+
+    SEPARATOR = "::"
+    WILDCARD = "*"
+
+    def __init__(self):
+        self._root = _DeckTrieNode()
+
+    def add(self, pattern: str, deck_config: DeckConfig):
+        node = self._root
+        for segment in pattern.split(DeckTrie.SEPARATOR):
+            node = node.children.setdefault(segment, _DeckTrieNode())
+        node.config = deck_config
+
+    def lookup(self, deck_name: str) -> "Optional[DeckConfig]":
+        segments = deck_name.split(DeckTrie.SEPARATOR)
+
+        best_rank = None
+        best_config = None
+
+        # (node, number of matched segments, 1 for each literal and 0 for each wildcard segment)
+        stack = [(self._root, 0, ())]
+        while stack:
+            node, depth, literals = stack.pop()
+
+            if node.config is not None:
+                rank = (depth, literals)
+                if best_rank is None or rank > best_rank:
+                    best_rank = rank
+                    best_config = node.config
+
+            if depth == len(segments):
+                continue
+
+            child = node.children.get(segments[depth])
+            if child is not None:
+                stack.append((child, depth + 1, literals + (1,)))
+
+            wildcard = node.children.get(DeckTrie.WILDCARD)
+            if wildcard is not None and segments[depth] != DeckTrie.WILDCARD:
+                stack.append((wildcard, depth + 1, literals + (0,)))
+
+        return best_config
+
+
+class _DeckTrieNode:
+    __slots__ = ["children", "config"]
+
+    def __init__(self):
+        self.children = {}
+        self.config = None
+
+
 class MaobiConfig:
     """MaobiConfig is the config as loaded from config.json."""
 
@@ -67,10 +134,35 @@ class MaobiConfig:
     DEFAULT_ENABLED = True
     DEFAULT_LENIENCY = 100
     DEFAULT_SHOW_HINT_AFTER_MISSES = 3
+    DEFAULT_VARIANT_FALLBACK = True
+    DEFAULT_PREFETCH = 5
+    DEFAULT_STREAM_AFTER = 2
+    DEFAULT_GRID_COLOR = "rgb(220,220,220)"
+    DEFAULT_GRID_STROKE_WIDTH = 0.5
+    DEFAULT_GRID_BORDER_WIDTH = 1
+
+    # The parsed config, shared by everything that needs it until the config changes
+    _instance = None
 
     def __init__(self, config_json: dict):
         self.debug = config_json.get("debug", False)
-        self.decks = set()
+        self.prefetch = config_json.get("prefetch", MaobiConfig.DEFAULT_PREFETCH)
+        self.inline_scripts = config_json.get("inline_scripts", False)
+        self.static_preview = config_json.get("static_preview", False)
+        self.log_strokes = config_json.get("log_strokes", False)
+
+        # How the grids are drawn, the same for all decks
+        self.grid_style = GridStyle(
+            config_json.get("grid_color", MaobiConfig.DEFAULT_GRID_COLOR),
+            config_json.get("grid_stroke_width", MaobiConfig.DEFAULT_GRID_STROKE_WIDTH),
+            config_json.get("grid_border_width", MaobiConfig.DEFAULT_GRID_BORDER_WIDTH),
+        )
+        self.stream_after = config_json.get(
+            "stream_after", MaobiConfig.DEFAULT_STREAM_AFTER
+        )
+
+        # Maps (deck, template) to its DeckConfig
+        self.decks = {}
 
         for e in config_json.get("decks", []):
             deck_config = DeckConfig(
@@ -84,35 +176,65 @@ class MaobiConfig:
                 e.get(
                     "show_hint_after_misses", MaobiConfig.DEFAULT_SHOW_HINT_AFTER_MISSES
                 ),
+                e.get("variant_fallback", MaobiConfig.DEFAULT_VARIANT_FALLBACK),
             )
-            self.decks.add(deck_config)
+            self.decks[(deck_config.deck, deck_config.template)] = deck_config
+
+        self._compile_decks()
+
+    def _compile_decks(self):
+        """Builds a DeckTrie per template from `self.decks`."""
+        self._deck_tries = {}
+        for (deck, template), deck_config in self.decks.items():
+            self._deck_tries.setdefault(template, DeckTrie()).add(deck, deck_config)
 
     @staticmethod
     def load() -> "MaobiConfig":
-        config_json = mw.addonManager.getConfig(__name__)
-        config = MaobiConfig(config_json)
-        return config
+        """Returns the config. config.json is only read and parsed again after it changed."""
+        if MaobiConfig._instance is None:
+            config_json = mw.addonManager.getConfig(__name__)
+            MaobiConfig._instance = MaobiConfig(config_json)
+        return MaobiConfig._instance
+
+    @staticmethod
+    def reload(config_json: dict):
+        """Replaces the loaded config, e.g. after the user edited it in the add-on manager."""
+        MaobiConfig._instance = MaobiConfig(config_json)
+
+    def save(self):
+        """Writes the config to config.json and makes it the loaded config."""
+        self._compile_decks()
+        mw.addonManager.writeConfig(__name__, self.as_object())
+        MaobiConfig._instance = self
 
     def search_active_deck_config(
         self, deck_name: str, template_name: str
     ) -> "Optional[DeckConfig]":
-        """Searches the active deck configuration.
+        """Searches the active deck configuration, see `DeckTrie` for how deck patterns and
+        parent decks are matched.
 
         Returns:
             The active deck configuration if maobi is active for this card else `None`.
 
         """
-        # Search for the correct configuration
-        for e in self.decks:
-            # Return if we find it
-            if e.deck == deck_name and e.template == template_name:
-                return e
-        else:
+        deck_config = self.find_deck_config(deck_name, template_name)
+
+        if deck_config is None:
             debug(
                 self,
                 f"No configuration found for: '{deck_name}' and template '{template_name}",
             )
+
+        return deck_config
+
+    def find_deck_config(
+        self, deck_name: str, template_name: str
+    ) -> "Optional[DeckConfig]":
+        """Like `search_active_deck_config`, but without reporting configs that are not found."""
+        deck_trie = self._deck_tries.get(template_name)
+        if deck_trie is None:
             return None
+        return deck_trie.lookup(deck_name)
 
     def as_object(self) -> dict:
         result = {"decks": []}
@@ -120,7 +242,31 @@ class MaobiConfig:
         if self.debug:
             result["debug"] = self.debug
 
-        for e in self.decks:
+        if self.prefetch != MaobiConfig.DEFAULT_PREFETCH:
+            result["prefetch"] = self.prefetch
+
+        if self.inline_scripts:
+            result["inline_scripts"] = self.inline_scripts
+
+        if self.log_strokes:
+            result["log_strokes"] = self.log_strokes
+
+        if self.static_preview:
+            result["static_preview"] = self.static_preview
+
+        if self.grid_style.color != MaobiConfig.DEFAULT_GRID_COLOR:
+            result["grid_color"] = self.grid_style.color
+
+        if self.grid_style.stroke_width != MaobiConfig.DEFAULT_GRID_STROKE_WIDTH:
+            result["grid_stroke_width"] = self.grid_style.stroke_width
+
+        if self.grid_style.border_width != MaobiConfig.DEFAULT_GRID_BORDER_WIDTH:
+            result["grid_border_width"] = self.grid_style.border_width
+
+        if self.stream_after != MaobiConfig.DEFAULT_STREAM_AFTER:
+            result["stream_after"] = self.stream_after
+
+        for e in self.decks.values():
             deck = {
                 "deck": e.deck,
                 "template": e.template,
@@ -130,6 +276,7 @@ class MaobiConfig:
                 "leniency": e.leniency,
                 "enabled": e.enabled,
                 "show_hint_after_misses": e.show_hint_after_misses,
+                "variant_fallback": e.variant_fallback,
             }
             result["decks"].append(deck)
 
@@ -154,6 +301,7 @@ class MaobiConfigDialog(QDialog):
         self._size = self._build_size_spin_box()
         self._leniency = self._build_leniency_slider()
         self._show_hint_after_misses = self._build_show_hint_after_misses_spin_box()
+        self._variant_fallback = self._build_variant_fallback_checkbox()
 
         formGroupBox = QGroupBox("Edit Maobi configuration")
         layout = QFormLayout()
@@ -163,6 +311,9 @@ class MaobiConfigDialog(QDialog):
         layout.addRow(QLabel("Size:"), self._size)
         layout.addRow(QLabel("Leniency:"), self._leniency)
         layout.addRow(QLabel("Show hint after misses:"), self._show_hint_after_misses)
+        layout.addRow(
+            QLabel("Use variants of missing characters:"), self._variant_fallback
+        )
         formGroupBox.setLayout(layout)
 
         buttonBox = QDialogButtonBox(
@@ -226,6 +377,11 @@ class MaobiConfigDialog(QDialog):
         spinBox.setValue(MaobiConfig.DEFAULT_SHOW_HINT_AFTER_MISSES)
         return spinBox
 
+    def _build_variant_fallback_checkbox(self) -> QCheckBox:
+        checkBox = QCheckBox(self)
+        checkBox.setChecked(MaobiConfig.DEFAULT_VARIANT_FALLBACK)
+        return checkBox
+
     def _accept(self):
         self._save_config()
         self.close()
@@ -256,10 +412,10 @@ class MaobiConfigDialog(QDialog):
         self._size.setValue(deck_config.size)
         self._leniency.setValue(deck_config.leniency)
         self._show_hint_after_misses.setValue(deck_config.show_hint_after_misses)
+        self._variant_fallback.setChecked(deck_config.variant_fallback)
 
     def _save_config(self):
         config = MaobiConfig.load()
-        deck_config = self._find_config_for_deck()
 
         deck_name = self._deck_name()
         template_name = self._template_name()
@@ -269,6 +425,7 @@ class MaobiConfigDialog(QDialog):
         size = self._size_value()
         leniency = self._leniency_value()
         show_hint_after_misses = self._show_hint_after_misses_value()
+        variant_fallback = self._is_variant_fallback()
 
         new_deck_config = DeckConfig(
             deck_name,
@@ -279,14 +436,14 @@ class MaobiConfigDialog(QDialog):
             leniency,
             enabled,
             show_hint_after_misses,
+            variant_fallback,
         )
 
-        # Remove the old config if it existed, then add the new one
-        config.decks.discard(deck_config)
-        config.decks.add(new_deck_config)
+        # Replace the old config if it existed
+        config.decks[(deck_name, template_name)] = new_deck_config
 
         # Write new config to disk
-        mw.addonManager.writeConfig(__name__, config.as_object())
+        config.save()
 
     def _find_config_for_deck(self):
         config = MaobiConfig.load()
@@ -319,6 +476,9 @@ class MaobiConfigDialog(QDialog):
     def _show_hint_after_misses_value(self) -> int:
         return self._show_hint_after_misses.value()
 
+    def _is_variant_fallback(self) -> bool:
+        return self._variant_fallback.isChecked()
+
 
 def maobi_add_config_button_hook(cardlayout: CardLayout):
     maobi_button = QPushButton("Maobi")
@@ -0,0 +1,168 @@
+from collections import Counter, defaultdict
+
+from aqt.utils import showText
+
+from .config import MaobiConfig
+from .notes import (
+    config_deck_ids,
+    find_notes,
+    read_fields,
+    run_in_background,
+    update_progress,
+)
+from .quiz import MaobiException, extract_characters
+from .store import get_character_store
+from .variants import find_variant
+
+# Progress is reported after every this many field contents
+CHUNK_SIZE = 500
+
+
+class CoverageReport:
+    """CoverageReport collects the problems found by the coverage scan."""
+
+    def __init__(self):
+        self.notes = 0
+        self.missing_characters = Counter()
+        self.variant_characters = Counter()
+        self.empty_fields = defaultdict(list)
+        self.missing_fields = defaultdict(set)
+
+    def __str__(self) -> str:
+        lines = [f"Checked {self.notes} notes."]
+
+        if self.missing_characters:
+            lines.append("")
+            lines.append("Characters without stroke data (number of notes):")
+            for character, count in self.missing_characters.most_common():
+                lines.append(f"  {character}: {count}")
+
+        if self.variant_characters:
+            lines.append("")
+            lines.append(
+                "Characters written as a variant with stroke data (number of notes):"
+            )
+            for (character, variant), count in self.variant_characters.most_common():
+                lines.append(f"  {character} served by variant {variant}: {count}")
+
+        if self.empty_fields:
+            lines.append("")
+            lines.append("Notes without characters to write:")
+            for field_name, note_ids in self.empty_fields.items():
+                lines.append(
+                    f"  Field '{field_name}': {len(note_ids)} notes, e.g. nid:{note_ids[0]}"
+                )
+
+        if self.missing_fields:
+            lines.append("")
+            lines.append("Note types without the configured field:")
+            for field_name, note_types in self.missing_fields.items():
+                names = ", ".join(sorted(note_types))
+                lines.append(f"  Field '{field_name}': {names}")
+
+        if len(lines) == 1:
+            lines.append("No problems found.")
+
+        return "\n".join(lines)
+
+
+def maobi_check_coverage():
+    """Checks for all notes quizzed by Maobi that their characters have stroke data and shows the
+    result. The scan runs in the background with a progress window."""
+    maobi_config = MaobiConfig.load()
+
+    run_in_background(
+        lambda col: _scan(col, maobi_config),
+        lambda report: showText(str(report), title="Maobi character coverage"),
+        "Checking Maobi character coverage...",
+    )
+
+
+def _scan(col, maobi_config: MaobiConfig) -> CoverageReport:
+    report = CoverageReport()
+
+    # Collect the field contents of all configured decks and templates with one query per config,
+    # together with whether missing characters are replaced by variants
+    fields = defaultdict(list)
+    seen = set()
+    for config, deck_ids in config_deck_ids(col, maobi_config).items():
+        note_ids = [
+            nid
+            for nid in find_notes(col, config, deck_ids)
+            if (nid, config.field) not in seen
+        ]
+        seen.update((nid, config.field) for nid in note_ids)
+
+        missing = set()
+        for note_id, characters_html in read_fields(
+            col, config.field, note_ids, missing
+        ):
+            report.notes += 1
+            fields[characters_html, config.variant_fallback].append(
+                (note_id, config.field)
+            )
+
+        if missing:
+            report.missing_fields[config.field].update(missing)
+
+        update_progress(f"Collected {report.notes} notes")
+
+    # Identical field contents only need to be checked once
+    unique_fields = list(fields.items())
+    chunks = [
+        unique_fields[i : i + CHUNK_SIZE]
+        for i in range(0, len(unique_fields), CHUNK_SIZE)
+    ]
+
+    # The checks are pure Python and would not run in parallel in threads. Every character is
+    # only looked up in the store once instead.
+    store = get_character_store()
+    known = {}
+    for i, chunk in enumerate(chunks):
+        empty, missing, variants = _check_chunk(store, chunk, known)
+        for note_id, field_name in empty:
+            report.empty_fields[field_name].append(note_id)
+        report.missing_characters.update(missing)
+        report.variant_characters.update(variants)
+
+        checked = min((i + 1) * CHUNK_SIZE, len(unique_fields))
+        update_progress(f"Checked {checked} of {len(unique_fields)} fields")
+
+    return report
+
+
+def _check_chunk(store, chunk: list, known: dict) -> tuple:
+    """Extracts the characters of the field contents in `chunk` and checks them in `store`. If
+    missing characters are replaced by variants for a field content, as the card does (see
+    `_substitute_variants`), the variant is checked instead. `known` maps the characters checked
+    so far to whether they are in `store`.
+
+    Returns:
+        A list of (note id, field name) of notes without characters, a Counter with the number
+        of notes per missing character and a Counter with the number of notes per (character,
+        variant) of the characters written as variant.
+
+    """
+    empty = []
+    missing = Counter()
+    variants = Counter()
+    for (characters_html, variant_fallback), notes in chunk:
+        try:
+            characters, _ = extract_characters(characters_html, notes[0][1])
+        except MaobiException:
+            empty.extend(notes)
+            continue
+
+        for c in set(characters):
+            if c not in known:
+                known[c] = c in store
+            if known[c]:
+                continue
+
+            variant = find_variant(c) if variant_fallback else None
+            if variant is not None and variant in store:
+                variants[c, variant] += len(notes)
+            else:
+                missing[c] += len(notes)
+
+    return empty, missing, variants
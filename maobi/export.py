@@ -0,0 +1,109 @@
+import hashlib
+import json
+
+from aqt import mw
+from aqt.utils import showText
+
+from .bundle import BUNDLE_PREFIX, Bundle, load_bundles, save_bundles
+from .config import MaobiConfig
+from .notes import (
+    config_deck_ids,
+    find_notes,
+    read_fields,
+    run_in_background,
+    update_progress,
+)
+from .quiz import MaobiException, extract_characters
+from .store import get_character_store
+from .variants import find_variant
+
+# Registers the character data of a bundle in the webview, see `quiz.js`
+BUNDLE_SCRIPT = (
+    "window.maobiCharacters = "
+    "Object.assign(window.maobiCharacters || {{}}, {{{entries}}});"
+)
+
+
+def maobi_export_bundles():
+    """Writes for every configured deck a file with the character data of all characters used in
+    the deck into the media folder. Cards of the deck then load the data from this file, which the
+    webview caches, instead of having it inlined. Bundles whose characters did not change are
+    kept as they are."""
+    maobi_config = MaobiConfig.load()
+    profile = mw.pm.name
+    old_bundles = load_bundles()
+
+    run_in_background(
+        lambda col: _export(col, maobi_config, profile, old_bundles),
+        lambda summary: showText(summary, title="Maobi character data export"),
+        "Exporting Maobi character data...",
+    )
+
+
+def _export(col, maobi_config: MaobiConfig, profile: str, old_bundles: dict) -> str:
+    store = get_character_store()
+    data = store.data_version()
+
+    bundles = {}
+    lines = []
+    for config, deck_ids in config_deck_ids(col, maobi_config).items():
+        # The same rules as for the card, see `_get_characters`
+        characters = set()
+        note_ids = find_notes(col, config, deck_ids)
+        for _, characters_html in read_fields(col, config.field, note_ids, set()):
+            try:
+                found, _ = extract_characters(characters_html, config.field)
+            except MaobiException:
+                continue
+            characters.update(found)
+
+        # The card writes the variants of missing characters instead, see `_substitute_variants`
+        if config.variant_fallback:
+            characters = {
+                c if c in store else (find_variant(c) or c) for c in characters
+            }
+
+        # Missing characters are reported by the card as usual
+        characters = frozenset(c for c in characters if c in store)
+        overlay = store.overlay_mtimes(characters)
+        key = (config.deck, config.template)
+        name = f"{config.deck} / {config.template}"
+
+        old = old_bundles.get(key)
+        if (
+            old is not None
+            and old.characters == characters
+            and old.data == data
+            and old.overlay == overlay
+            and col.media.have(old.file_name)
+        ):
+            bundles[key] = old
+            lines.append(f"{name}: unchanged, {len(characters)} characters")
+            continue
+
+        content = _build_bundle(store, sorted(characters)).encode("utf-8")
+        file_name = BUNDLE_PREFIX + hashlib.sha1(content).hexdigest()[:10] + ".js"
+        file_name = col.media.write_data(file_name, content)
+
+        bundles[key] = Bundle(file_name, characters, data, overlay)
+        lines.append(f"{name}: {len(characters)} characters, {len(content)} bytes")
+        update_progress(f"Exported {len(bundles)} decks")
+
+    # Bundles can be shared by decks with the same characters
+    unused = {b.file_name for b in old_bundles.values()} - {
+        b.file_name for b in bundles.values()
+    }
+    if unused:
+        col.media.trash_files(list(unused))
+
+    save_bundles(profile, bundles)
+
+    if not lines:
+        lines.append("No enabled decks found.")
+
+    return "\n".join(lines)
+
+
+def _build_bundle(store, characters: list) -> str:
+    entries = ", ".join(f"{json.dumps(c)}: {store.get(c)}" for c in characters)
+    return BUNDLE_SCRIPT.format(entries=entries)
@@ -0,0 +1,197 @@
+import html
+import re
+
+# All CJK ideographs: the unified ideographs with extensions A to I, the compatibility
+# ideographs and the ideographic number zero
+IDEOGRAPH_RANGES = (
+    "\u3007"
+    "\u3400-\u4dbf"
+    "\u4e00-\u9fff"
+    "\uf900-\ufaff"
+    "\U00020000-\U0002ee5f"
+    "\U0002f800-\U0002fa1f"
+    "\U00030000-\U000323af"
+)
+IDEOGRAPH = re.compile(f"[{IDEOGRAPH_RANGES}]")
+NON_IDEOGRAPHS = re.compile(f"[^{IDEOGRAPH_RANGES}]+")
+
+# One token is either text, a closing tag, an element with tone class that only contains text,
+# an opening tag, an entity, a script/style element or a comment. The kind of token is its
+# outermost group. The most frequent kinds come first.
+TOKEN = re.compile(
+    r"(?P<text>[^<&]+)"
+    r"|(?P<close></(?P<close_name>[a-zA-Z][^\s/>]*)[^>]*>)"
+    r"|(?P<toned><(?P<toned_name>[a-zA-Z][a-zA-Z0-9]*) class=[\"']?(?:[^\"'>\s]+\s+)*?"
+    r"(?P<toned_tone>(?i:tone)[1-5])\b[^>]*>(?P<toned_text>[^<&]*)</(?P=toned_name)>)"
+    r"|(?P<open><(?!(?i:script|style)\b)(?P<name>[a-zA-Z][^\s/>]*)(?P<attrs>[^>]*)>)"
+    r"|(?P<entity>&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);)"
+    r"|(?P<raw><(?P<raw_name>(?i:script|style))\b.*?</(?P=raw_name)\s*>)"
+    r"|(?P<comment><!--.*?-->)"
+    r"|(?P<other>[<&])",
+    re.DOTALL,
+)
+
+# The groups of `TOKEN` by number, the kind of a token is its `lastindex`
+_TEXT = TOKEN.groupindex["text"]
+_CLOSE = TOKEN.groupindex["close"]
+_CLOSE_NAME = TOKEN.groupindex["close_name"]
+_TONED = TOKEN.groupindex["toned"]
+_TONED_TONE = TOKEN.groupindex["toned_tone"]
+_TONED_TEXT = TOKEN.groupindex["toned_text"]
+_OPEN = TOKEN.groupindex["open"]
+_NAME = TOKEN.groupindex["name"]
+_ATTRS = TOKEN.groupindex["attrs"]
+_ENTITY = TOKEN.groupindex["entity"]
+
+# The tone colors of e.g. Chinese Support Redux are css classes tone1 ... tone5
+TONE_CLASS = re.compile(
+    r"""\bclass\s*=\s*["']?[^"'>]*?\b(tone[1-5])\b""", re.IGNORECASE
+)
+
+# Checks whether markup could contain a tone class, before searching for it
+TONE = re.compile("tone", re.IGNORECASE)
+
+# The common colored field: every ideograph in its own element with tone class, e.g.
+# `<span class="tone3">好</span>` or `<span class="tone3"><b>好</b></span>`. Before the ideograph,
+# only opening tags without tone class are allowed, they cannot change its tone. After it, any
+# tags but the end of the element. Splitting at these elements returns the markup between them
+# and the (name, tone, ideograph) of every element. The pattern is stricter than `TOKEN`, as that
+# makes it faster. Elements it does not match stay in the markup between.
+TONED_IDEOGRAPH = re.compile(
+    r"<([a-zA-Z][a-zA-Z0-9]*) class=[\"']?(?:[^\"'>\s]+\s+)*?((?i:tone)[1-5])\b[^>]*>"
+    r"(?:<[a-zA-Z](?![^>]*(?i:tone))[^>]*>)*"
+    rf"([{IDEOGRAPH_RANGES}])"
+    r"(?:<(?!/\1\b)/?[a-zA-Z][^>]*>)*</\1>"
+)
+
+# Markup that only the tokenizer handles correctly
+NEEDS_TOKENIZER = re.compile(r"<!--|<(?i:script|style)\b")
+
+# Tags as recognized by the tokenizer, a `<` not followed by a tag name is text
+TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+
+# Of the entities, only character references can stand for ideographs
+CHARACTER_REFERENCE = re.compile(r"&#(?:[0-9]+|[xX][0-9a-fA-F]+);")
+
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+
+def tokenize_characters(characters_html: str) -> tuple:
+    """Walks `characters_html` once and returns its CJK ideographs together with the tone of the
+    element they are in. Text in comments, scripts and styles is ignored, entities are decoded.
+
+    Returns:
+        characters (tuple[list[str], list[str])): The ideographs and their tones. The tones are
+        only returned if every ideograph has one, else they are empty.
+
+    """
+
+    # Fields without markup need no tokenizing
+    if "<" not in characters_html and "&" not in characters_html:
+        return list(NON_IDEOGRAPHS.sub("", characters_html)), []
+
+    if NEEDS_TOKENIZER.search(characters_html) is not None:
+        return _tokenize(characters_html)
+
+    # Without tones, only the text between the tags counts
+    if TONE.search(characters_html) is None:
+        text = _decode_entities(TAG.sub("", characters_html))
+        return list(NON_IDEOGRAPHS.sub("", text)), []
+
+    # Colored fields with every ideograph in its own toned element, and none outside of them
+    parts = TONED_IDEOGRAPH.split(characters_html)
+    between = _decode_entities(TAG.sub("", "".join(parts[::4])))
+    if IDEOGRAPH.search(between) is None:
+        tones = parts[2::4]
+        if not "".join(tones).islower():
+            tones = [tone.lower() for tone in tones]
+        return parts[3::4], tones
+
+    return _tokenize(characters_html)
+
+
+def _decode_entities(text: str) -> str:
+    if "&#" not in text:
+        return text
+    return CHARACTER_REFERENCE.sub(lambda m: html.unescape(m.group(0)), text)
+
+
+def _tokenize(characters_html: str) -> tuple:
+    characters = []
+    tones = []
+    has_all_tones = True
+
+    # Elements that are open while a tone applies, as (tag name, tone of the element or
+    # inherited from its parent). Outside of toned elements nothing needs to be tracked.
+    stack = []
+    tone = None
+
+    find_ideographs = IDEOGRAPH.findall
+
+    for match in TOKEN.finditer(characters_html):
+        kind = match.lastindex
+
+        if kind == _TEXT or kind == _ENTITY:
+            text = match.group()
+            if kind == _ENTITY:
+                text = html.unescape(text)
+
+            found = find_ideographs(text)
+            if found:
+                characters += found
+                if tone is None:
+                    has_all_tones = False
+                elif has_all_tones:
+                    tones += [tone] * len(found)
+
+        elif kind == _CLOSE:
+            if not stack:
+                continue
+
+            # Also closes elements that were left open
+            name = match.group(_CLOSE_NAME).lower()
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i][0] == name:
+                    del stack[i:]
+                    tone = stack[-1][1] if stack else None
+                    break
+
+        elif kind == _TONED:
+            found = find_ideographs(match.group(_TONED_TEXT))
+            if found:
+                characters += found
+                if has_all_tones:
+                    tones += [match.group(_TONED_TONE).lower()] * len(found)
+
+        elif kind == _OPEN:
+            name, attrs = match.group(_NAME, _ATTRS)
+            tone_match = TONE_CLASS.search(attrs) if TONE.search(attrs) else None
+            if tone_match is None and tone is None:
+                continue
+
+            name = name.lower()
+            if name in VOID_ELEMENTS or attrs.endswith("/"):
+                continue
+
+            if tone_match is not None:
+                tone = tone_match.group(1).lower()
+            stack.append((name, tone))
+
+    if not has_all_tones:
+        tones = []
+
+    return characters, tones
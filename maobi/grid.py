@@ -0,0 +1,104 @@
+"""Builds the background grids of the character boxes. The coordinates need to be computed in
+this complicated way, as the stroke width needs to be taken into account.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import quote
+
+# Color and width of the grid lines and width of the border around the character box in px, see
+# `MaobiConfig`. The border is drawn by CSS, as it should not scale with the box.
+GridStyle = namedtuple("GridStyle", ["color", "stroke_width", "border_width"])
+
+# The grids are drawn in a 100x100 box and scaled to the size of the character box
+SIZE = 100
+
+# The side of the inner square of 回宫格 relative to the outer one
+HUI_INNER = 0.618
+
+SVG_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+    'viewBox="0 0 {size} {size}">{lines}</svg>'
+)
+
+
+@lru_cache(maxsize=None)
+def grid_data_uri(name: str, style: GridStyle) -> str:
+    """Returns the grid `name` drawn with `style` as data URI, ready to be used in CSS. Every
+    grid is built once per process.
+
+    Returns:
+        The data URI, or an empty string for unknown grids, e.g. "none".
+
+    """
+    svg = build_grid_svg(name, style)
+    if not svg:
+        return ""
+
+    return "data:image/svg+xml;charset=utf8," + quote(svg)
+
+
+def build_grid_svg(name: str, style: GridStyle) -> str:
+    """Draws the grid `name` ("field", "rice", "hui" or "nine") with `style` as SVG.
+
+    Returns:
+        The SVG, or an empty string for unknown grids, e.g. "none".
+
+    """
+    lines = build_grid_lines(name, style)
+    if not lines:
+        return ""
+
+    return SVG_TEMPLATE.format(size=SIZE, lines=lines)
+
+
+def build_grid_lines(name: str, style: GridStyle) -> str:
+    """Draws the lines of the grid `name` with `style` as SVG elements in a box of size `SIZE`,
+    e.g. to be embedded into a larger SVG.
+
+    Returns:
+        The lines, or an empty string for unknown grids, e.g. "none".
+
+    """
+    builders = {"field": _field, "rice": _rice, "hui": _hui, "nine": _nine}
+    if name not in builders:
+        return ""
+
+    return "".join(_line(*coordinates, style) for coordinates in builders[name](style))
+
+
+def _field(style: GridStyle) -> list:
+    """田: horizontal and vertical center line"""
+    return [(SIZE / 2, 0, SIZE / 2, SIZE), (0, SIZE / 2, SIZE, SIZE / 2)]
+
+
+def _rice(style: GridStyle) -> list:
+    """米: the field grid and both diagonals"""
+    o = style.stroke_width / 2
+    return [
+        (o, o, SIZE - o, SIZE - o),
+        (o, SIZE - o, SIZE - o, o),
+    ] + _field(style)
+
+
+def _hui(style: GridStyle) -> list:
+    """回: a centered inner square"""
+    a = SIZE * (1 - HUI_INNER) / 2
+    b = SIZE - a
+    return [(a, a, b, a), (b, a, b, b), (b, b, a, b), (a, b, a, a)]
+
+
+def _nine(style: GridStyle) -> list:
+    """九宫格: two horizontal and two vertical lines dividing the box into thirds"""
+    lines = []
+    for p in [SIZE / 3, SIZE * 2 / 3]:
+        lines.append((p, 0, p, SIZE))
+        lines.append((0, p, SIZE, p))
+    return lines
+
+
+def _line(x1: float, y1: float, x2: float, y2: float, style: GridStyle) -> str:
+    return (
+        f'<line stroke="{style.color}" stroke-width="{style.stroke_width}" '
+        f'x1="{x1:g}" y1="{y1:g}" x2="{x2:g}" y2="{y2:g}" />'
+    )
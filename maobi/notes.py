@@ -0,0 +1,125 @@
+"""Queries for the notes quizzed by Maobi, shared by the operations that scan the collection in the
+background: the coverage check, the export of bundles and the warm up. See `run_in_background`
+for running them."""
+
+from collections import defaultdict
+
+from anki.utils import ids2str
+from aqt import mw
+
+from .config import DeckConfig, MaobiConfig
+
+
+def config_deck_ids(col, maobi_config: MaobiConfig) -> dict:
+    """Finds the decks of every enabled config. Configs can match several decks and be inherited
+    by subdecks, so the matching is done for every deck as when reviewing, see `DeckTrie`.
+
+    Returns:
+        dict[DeckConfig, list[int]]: The ids of the decks that use each config.
+
+    """
+    templates = {config.template for config in maobi_config.decks.values()}
+    deck_ids = defaultdict(list)
+    for deck in col.decks.all_names_and_ids():
+        for template in templates:
+            config = maobi_config.find_deck_config(deck.name, template)
+            if config is not None and config.enabled:
+                deck_ids[config].append(deck.id)
+
+    return deck_ids
+
+
+def find_notes(col, config: DeckConfig, deck_ids: list, search: str = "") -> list:
+    """Returns the ids of the notes with a card of `config.template` in one of `deck_ids`,
+    optionally restricted by the Anki search `search`. Subdecks are not included, they are
+    matched on their own."""
+    dids = ",".join(str(i) for i in deck_ids)
+    template = _escape(config.template)
+    return col.find_notes(f'did:{dids} card:"{template}" {search}'.strip())
+
+
+def read_fields(col, field_name: str, note_ids: list, missing: set):
+    """Reads the field `field_name` of the notes `note_ids` with a single query.
+
+    Yields:
+        (note id, field content). Notes whose type has no such field are skipped, the name of
+        their note type is added to `missing`.
+
+    """
+    field_indices = {}
+    for note_id, notetype_id, flds in col.db.execute(
+        f"select id, mid, flds from notes where id in {ids2str(note_ids)}"
+    ):
+        if notetype_id not in field_indices:
+            field_indices[notetype_id] = _field_index(
+                col, notetype_id, field_name, missing
+            )
+
+        idx = field_indices[notetype_id]
+        if idx is None:
+            continue
+
+        yield note_id, flds.split("\x1f")[idx]
+
+
+def run_in_background(op, success, label: str = None, failure=None):
+    """Runs `op(col)` in a background thread and then `success(result)` on the main thread, with a
+    progress window showing `label` if given. Errors are passed to `failure`, if given, else they
+    are shown by Anki. `QueryOp` is only available from Anki 2.1.45, older versions use the task
+    manager."""
+    try:
+        from aqt.operations import QueryOp
+    except ImportError:
+        QueryOp = None
+
+    if QueryOp is not None:
+        query_op = QueryOp(parent=mw, op=op, success=success)
+        if failure is not None:
+            query_op.failure(failure)
+        if label is not None:
+            query_op = query_op.with_progress(label)
+        query_op.run_in_background()
+        return
+
+    def on_done(future):
+        if label is not None:
+            mw.progress.finish()
+
+        try:
+            result = future.result()
+        except Exception as e:
+            if failure is None:
+                raise
+            failure(e)
+            return
+
+        success(result)
+
+    if label is not None:
+        mw.progress.start(label=label)
+
+    col = mw.col
+    mw.taskman.run_in_background(lambda: op(col), on_done)
+
+
+def update_progress(label: str):
+    """Updates the label of the progress window, can be called from a background thread."""
+    mw.taskman.run_on_main(lambda: mw.progress.update(label=label))
+
+
+def _field_index(col, notetype_id: int, field_name: str, missing: set):
+    notetype = col.models.get(notetype_id)
+    field_names = [f["name"] for f in notetype["flds"]]
+
+    if field_name not in field_names:
+        missing.add(notetype["name"])
+        return None
+
+    return field_names.index(field_name)
+
+
+def _escape(text: str) -> str:
+    """Escapes `text` to be used literally in a quoted Anki search term."""
+    for c in '\\"*_':
+        text = text.replace(c, "\\" + c)
+    return text
@@ -0,0 +1,143 @@
+import mmap
+import struct
+import sys
+import zlib
+from typing import Iterable, Optional
+
+# A character pack is a single file that contains the data of all characters:
+#
+#   header  MAGIC, number of records (uint32), reserved (uint32)
+#   index   one record per character, sorted by code point:
+#           code point, offset into the data, length of the data, flags (all uint32)
+#   data    the character data (UTF-8 JSON), zlib compressed if FLAG_COMPRESSED is set
+#
+# All integers are little endian. It is built by `scripts/build_character_pack.py`.
+
+MAGIC = b"MAOBIPK1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<IIII")
+FLAG_COMPRESSED = 1
+
+# Number of uint32 per index record
+_RECORD_WIDTH = RECORD.size // 4
+
+
+class CharacterPack:
+    """CharacterPack reads character data from a character pack. The file is memory mapped, a
+    lookup is a binary search over the index followed by a slice of the data."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, _ = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a character pack!")
+
+        index_end = HEADER.size + self._count * RECORD.size
+        self._data_start = index_end
+
+        # Without copying, the index can be read as uint32 array on little endian machines
+        if sys.byteorder == "little":
+            self._index = memoryview(self._mmap)[HEADER.size : index_end].cast("I")
+        else:
+            self._index = None
+
+    def get(self, character: str) -> Optional[str]:
+        """Returns the character data for `character` or `None` if there is none."""
+        i = self._find(character)
+        if i < 0:
+            return None
+
+        _, offset, length, flags = self._record(i)
+        start = self._data_start + offset
+
+        with memoryview(self._mmap)[start : start + length] as view:
+            if flags & FLAG_COMPRESSED:
+                return zlib.decompress(view).decode("utf-8")
+            return str(view, "utf-8")
+
+    def __contains__(self, character: str) -> bool:
+        return self._find(character) >= 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        if self._index is not None:
+            self._index.release()
+            self._index = None
+        self._mmap.close()
+
+    def _find(self, character: str) -> int:
+        """Returns the position of `character` in the index or -1 if it is not there."""
+        if len(character) != 1:
+            return -1
+
+        codepoint = ord(character)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._codepoint(mid)
+            if value < codepoint:
+                lo = mid + 1
+            elif value > codepoint:
+                hi = mid
+            else:
+                return mid
+
+        return -1
+
+    def _codepoint(self, i: int) -> int:
+        if self._index is not None:
+            return self._index[i * _RECORD_WIDTH]
+        return self._record(i)[0]
+
+    def _record(self, i: int) -> tuple:
+        return RECORD.unpack_from(self._mmap, HEADER.size + i * RECORD.size)
+
+
+def write_character_pack(path: str, characters: Iterable, compress: bool = True) -> int:
+    """Writes a character pack to `path`.
+
+    Args:
+        characters: (character, character data) pairs, with character data as string
+        compress: Whether to compress records. A record is only compressed if this saves space.
+
+    Returns:
+        The number of characters written.
+
+    """
+    records = []
+    for character, character_data in characters:
+        if len(character) != 1:
+            raise ValueError(f"'{character}' is not a single character!")
+
+        data = character_data.encode("utf-8")
+        flags = 0
+
+        if compress:
+            compressed = zlib.compress(data, 9)
+            if len(compressed) < len(data):
+                data = compressed
+                flags |= FLAG_COMPRESSED
+
+        records.append((ord(character), data, flags))
+
+    records.sort(key=lambda e: e[0])
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), 0))
+
+        offset = 0
+        for codepoint, data, flags in records:
+            f.write(RECORD.pack(codepoint, offset, len(data), flags))
+            offset += len(data)
+
+        for _, data, _ in records:
+            f.write(data)
+
+    return len(records)
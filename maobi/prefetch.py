@@ -0,0 +1,102 @@
+from anki.cards import Card
+from aqt import mw
+
+from .config import MaobiConfig
+from .quiz import MaobiException, extract_characters
+from .store import get_character_store
+from .util import debug
+from .variants import find_variant
+
+_prefetch_running = False
+
+
+def maobi_prefetch_hook(*args):
+    """Loads the character data of the next cards in the review queue into the character store,
+    so that showing these cards does not have to wait for it. Accepts and ignores hook arguments.
+    """
+    global _prefetch_running
+
+    # The previous prefetch is still running, the next review will trigger a new one
+    if _prefetch_running:
+        return
+
+    maobi_config = MaobiConfig.load()
+    if maobi_config.prefetch <= 0:
+        return
+
+    # Everything that touches the collection is done here on the main thread
+    fields = _collect_upcoming_fields(maobi_config)
+    if not fields:
+        return
+
+    _prefetch_running = True
+    mw.taskman.run_in_background(
+        lambda: _prefetch(fields),
+        lambda future: _on_prefetch_done(maobi_config, future),
+    )
+
+
+def _collect_upcoming_fields(maobi_config: MaobiConfig) -> list:
+    """Returns the (field content, field name, variant fallback) of the upcoming cards that Maobi
+    quizzes."""
+    sched = mw.col.sched
+
+    # Only the v3 scheduler exposes its queue
+    if not hasattr(sched, "get_queued_cards"):
+        return []
+
+    deck_name = mw.col.decks.current()["name"]
+
+    # Called after the answer, so the answered card is no longer part of the queue
+    queued_cards = sched.get_queued_cards(fetch_limit=maobi_config.prefetch)
+
+    fields = []
+    for queued_card in queued_cards.cards:
+        card = Card(mw.col, backend_card=queued_card.card)
+        template_name = card.template()["name"]
+        config = maobi_config.search_active_deck_config(deck_name, template_name)
+
+        if not config or not config.enabled:
+            continue
+
+        note = card.note()
+        if config.field not in note:
+            continue
+
+        fields.append((note[config.field], config.field, config.variant_fallback))
+
+    return fields
+
+
+def _prefetch(fields: list) -> int:
+    """Runs in a background thread, must therefore not access the collection."""
+    store = get_character_store()
+
+    characters = {}
+    for characters_html, field_name, variant_fallback in fields:
+        try:
+            found, _ = extract_characters(characters_html, field_name)
+        except MaobiException:
+            continue
+
+        # The card writes the variants of missing characters instead, see `_substitute_variants`
+        for c in found:
+            if variant_fallback and c not in store:
+                c = find_variant(c) or c
+            characters[c] = None
+
+    return store.prefetch(characters)
+
+
+def _on_prefetch_done(maobi_config: MaobiConfig, future):
+    global _prefetch_running
+
+    _prefetch_running = False
+
+    try:
+        count = future.result()
+    except Exception as e:
+        debug(maobi_config, f"Prefetching failed: {e}")
+        return
+
+    debug(maobi_config, f"Prefetched {count} characters")
@@ -0,0 +1,118 @@
+import json
+import re
+from functools import lru_cache
+from string import Template
+
+from .grid import GridStyle
+from .quiz import (
+    TARGET_DIV,
+    MaobiException,
+    _build_hanzi_grid_style,
+    _load_character_data,
+)
+from .store import get_character_store
+
+# Number of rendered characters that are kept
+SVG_CACHE_SIZE = 2000
+
+# The version of the character overlay the cached characters were rendered with
+_svg_overlay_version = None
+
+# The character div of the card template, in which the characters are rendered
+TARGET_DIV_TAG = re.compile(
+    r"<[a-zA-Z][^>]*\bid\s*=\s*[\"']?" + re.escape(TARGET_DIV) + r"(?=[\"'\s>])[^>]*>"
+)
+
+TEMPLATE = Template(
+    """
+<style scoped>
+#$target_div {
+    display: flex;
+    flex-wrap: wrap;
+    justify-content: center;
+    gap: 20px;
+}
+
+#$target_div > div {
+    width: ${size}px;
+    height: ${size}px;
+
+    outline-color: rgb(0, 0, 0);
+    outline-style: solid;
+    outline-width: 1px;
+    outline-offset: -1px;
+}
+
+$styles
+</style>
+"""
+)
+
+# Hanzi Writer data uses a 1024x1024 box with the y axis pointing up
+SVG_TEMPLATE = Template(
+    '<svg xmlns="http://www.w3.org/2000/svg" width="$size" height="$size" '
+    'viewBox="0 0 1024 1024"><g transform="translate(0, 900) scale(1, -1)" '
+    'fill="currentColor">$paths</g></svg>'
+)
+
+
+def render_static_preview(
+    html: str, characters: list, tones: list, config, grid_style: GridStyle
+) -> str:
+    """Renders the strokes of `characters` as static SVG into the character div of `html`,
+    without the quiz and without any JavaScript. Used for contexts in which cards are only looked
+    at, where starting Hanzi Writer for every card would be too slow.
+
+    Raises:
+        MaobiException:
+            - If data for a character was not found.
+            - If `html` has no character div.
+
+    """
+    global _svg_overlay_version
+
+    match = TARGET_DIV_TAG.search(html)
+    if match is None:
+        raise MaobiException(f"There is no element with id '{TARGET_DIV}' in the card!")
+
+    # Characters are rendered again once their data may have changed in the overlay
+    overlay_version = get_character_store().overlay_version()
+    if overlay_version != _svg_overlay_version:
+        _render_character_svg.cache_clear()
+        _svg_overlay_version = overlay_version
+
+    divs = []
+    for i, c in enumerate(characters):
+        svg = _render_character_svg(c, config.size)
+        tone = f' class="{tones[i]}"' if tones else ""
+        divs.append(f"<div{tone}>{svg}</div>")
+
+    return (
+        _build_preview_style(config.grid, grid_style, config.size)
+        + html[: match.end()]
+        + "".join(divs)
+        + html[match.end() :]
+    )
+
+
+@lru_cache(maxsize=64)
+def _build_preview_style(grid, grid_style: GridStyle, size: int) -> str:
+    return TEMPLATE.substitute(
+        target_div=TARGET_DIV,
+        size=size,
+        styles=_build_hanzi_grid_style(grid, grid_style),
+    )
+
+
+@lru_cache(maxsize=SVG_CACHE_SIZE)
+def _render_character_svg(character: str, size: int) -> str:
+    """Renders the strokes of `character` as SVG of `size` x `size` pixels. The strokes are
+    filled with the current text color, so that tone colors and the night mode apply.
+
+    Raises:
+        MaobiException: If data for `character` was not found.
+
+    """
+    strokes = json.loads(_load_character_data(character))["strokes"]
+    paths = "".join(f'<path d="{stroke}" />' for stroke in strokes)
+    return SVG_TEMPLATE.substitute(size=size, paths=paths)
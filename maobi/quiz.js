@@ -1,233 +1,597 @@
-var curCharacterIdx = -1;
-var curQuizDiv = undefined;
-var curWriter = undefined;
-var prevCharacterDivs = [];
-
-var CHAR_SPACING = 20;
-var STROKE_COLOR_DAY = '#333';
-var STROKE_COLOR_NIGHT = '#FFF';
-
-var restartQuizAnimationInProgress = false;
-var completedStrokes = 0;    //  number of completed strokes of the current quiz
-
-var revealButton = document.getElementById(config.revealButton);
-var restartButton = document.getElementById(config.restartButton);
-var targetDiv = document.getElementById(config.targetDiv);
-
-var TONE_COLORS = getToneColors();
-
 /**
- * Starts the quiz for the next character and moves all previous characters to the left
- * @param animation 'none' disables animations, 'default' uses a right-to-left fade-in, 'opacity' only animates opacity
+ * Starts the Maobi quiz. This file is either served as a web export or inlined into the card, see `quiz.py`.
+ * @param config the quiz configuration, e.g. size and leniency
+ * @param data the characters, tones and character data of the card
  */
-function quizNextCharacter(animation) {
-    if (curCharacterIdx < data.characters.length - 1) {
-        if (curQuizDiv !== undefined) {
-            prevCharacterDivs.unshift(curQuizDiv);
-        }
-        curCharacterIdx++;
-        curQuizDiv = document.createElement("div");
-        targetDiv.append(curQuizDiv);
-        curQuizDiv.style['margin-left'] = -Math.floor(config.size / 2) + 'px';
+function maobiQuiz(config, data) {
+    var curCharacterIdx = -1;
+    var curQuizDiv = undefined;
+    var curWriter = undefined;
+    var prevCharacterDivs = [];
+    var freeDivs = [];          // pooled character divs that currently show no character
 
-        var character = data.characters[curCharacterIdx];
-        var characterData = data.charactersData[curCharacterIdx];
-        var drawingColor = document.body.classList.contains('nightMode') ? STROKE_COLOR_NIGHT : STROKE_COLOR_DAY;
-        var toneColor = data.tones.length > 0 ? TONE_COLORS[data.tones[curCharacterIdx]] : drawingColor;
+    var CHAR_SPACING = 20;
+    var STROKE_COLOR_DAY = '#333';
+    var STROKE_COLOR_NIGHT = '#FFF';
 
-        quizCharacter(character, characterData, toneColor, drawingColor, curQuizDiv);
+    var STREAM_LOOKAHEAD = 2;  // number of upcoming characters whose data is requested in advance
+    var STREAM_COMMAND = 'maobi:characters:';
 
-        if (animation !== 'none') {
-            curQuizDiv.style.opacity = '0';
-            if (curCharacterIdx > 0 && animation === 'default') {
-                curQuizDiv.style['margin-left'] = Math.floor(config.size / 2) + CHAR_SPACING + 'px';
-            }
+    var TIMINGS_COMMAND = 'maobi:timings:';
+    var STROKES_COMMAND = 'maobi:strokes:';
+    var BATCH_SIZE = 20;     // timings and strokes are sent to Python in batches of this size...
+    var BATCH_DELAY = 2000;  // ...or this many ms after the first entry of a batch
+    var MARK_PREFIX = 'maobi.';
 
-            // let webkit render the content before repositioning the new (new) character div. Otherwise the fade-in
-            // animation is ignored
-            setTimeout(function () {
-                repositionDivs()
-            }, 50);
-        }
-    }
-}
+    // Number of character divs, each with its own HanziWriter, that are created at most: the current character and the
+    // 5 previous ones that are visible. The div of the oldest character is reused for the next one. This bounds the
+    // size of the DOM, but the strokes are still rebuilt for every character, see `quizCharacter`.
+    var POOL_SIZE = 6;
 
-/**
- * Repositions all character divs (thereby triggering css animations)
- */
-function repositionDivs() {
-    prevCharacterDivs.forEach(function (div, idx) {
-        if (idx < 5) {
-            div.style['margin-left'] = Math.floor(-config.size / 2 - (config.size + CHAR_SPACING) * (idx + 1)) + 'px';
-        } else {
-            div.style.display = 'none';
-        }
-    });
-
-    curQuizDiv.style['margin-left'] = -Math.floor(config.size / 2) + 'px';
-    curQuizDiv.style.opacity = '1';
-}
-
-/**
- * Creates and starts the HanziWriter quiz for a given character
- * @param character the character to quiz for
- * @param characterData stroke data
- * @param targetDiv div that should be used for rendering the quiz
- * @param toneColor color of the tone
- * @param drawingColor color of the stroke the user draws
- * @param targetDiv div that should be used for rendering the quiz
- */
-function quizCharacter(character, characterData, toneColor, drawingColor, targetDiv) {
-    curWriter = HanziWriter.create(targetDiv, character, {
-        width: config.size,
-        height: config.size,
-        showCharacter: false,
-        showOutline: false,
-        highlightOnComplete: true,
-        leniency: config.leniency,
-        padding: 0,
-        delayBetweenStrokes: 200,
-        strokeColor: toneColor,
-        drawingColor: drawingColor,
-        drawingWidth: 5,
-        showHintAfterMisses: config.showHintAfterMisses || Number.MAX_SAFE_INTEGER, // setting showHintAfterMisses to
-        // false does not disable the feature
-        charDataLoader: function (char, onComplete) {
-            onComplete(characterData);
-        },
-        onComplete: function (data) {
+    var QUIZ_OPTIONS = {
+        onComplete: function () {
             // wait for HanziWriter finish animation
             curWriter = undefined;
             setTimeout(function () {
                 quizNextCharacter('default')
             }, 200);
         },
-        onCorrectStroke: function(data){
+        onCorrectStroke: function (data) {
             completedStrokes = data.strokeNum + 1;
+            measureStrokeGrading();
+
+            mistakenStroke = undefined;
+            logStroke(data, true);
+        },
+        onMistake: function (data) {
+            measureStrokeGrading();
+
+            if (config.logStrokes) {
+                mistakenStroke = data;
+            }
         },
+    };
+
+    var restartQuizAnimationInProgress = false;
+    var completedStrokes = 0;    //  number of completed strokes of the current quiz
+    var mistakenStroke = undefined;  // data of the last mistake on the current stroke, until the stroke is accepted
+
+    var revealButton = document.getElementById(config.revealButton);
+    var restartButton = document.getElementById(config.restartButton);
+    var targetDiv = document.getElementById(config.targetDiv);
+
+    // timings measured in debug mode and written strokes (see `strokes.py`) that were not sent to Python yet
+    var timingsBatch = createBatch(TIMINGS_COMMAND, function (timings) {
+        return {card: data.characters.join(''), timings: timings};
     });
-    curWriter.quiz();
-    completedStrokes = 0;
-}
+    var strokesBatch = createBatch(STROKES_COMMAND, function (strokes) {
+        return strokes;
+    });
+    var firstRenderMeasured = false;
+    var strokeEndMarked = false;
 
-/**
- * Stops the quiz, reveals the current character, and animates it. Then starts the quiz for this character again
- */
-function revealCurrentCharacter() {
-    if (curWriter !== undefined && !restartQuizAnimationInProgress) {
-        var writer = curWriter;
-        writer.showOutline();
-        writer.cancelQuiz();
-        completedStrokes = 0;
-        writer.animateCharacter({
-            onComplete: function (e) {
-                if (!e.canceled) {
-                    // if the animation has been canceled, we do not need to hide
-                    setTimeout(function () {
-                        writer.hideCharacter();
-                        writer.quiz();
-                    }, 1000);
+    mark('shown');
+
+    mark('tone_colors');
+    var TONE_COLORS = getToneColors();
+    measure('tone_colors', 'tone_colors');
+
+    var requestedCharacters = {};   // characters whose data has been requested from Python
+    var pendingLoaders = {};        // {onComplete, onError} waiting for the data of a character
+    var unavailableCharacters = {}; // characters which Python has no data for
+
+    /**
+     * Starts the quiz for the next character and moves all previous characters to the left
+     * @param animation 'none' disables animations, 'default' uses a right-to-left fade-in, 'opacity' only animates opacity
+     */
+    function quizNextCharacter(animation) {
+        if (curCharacterIdx < data.characters.length - 1) {
+            if (curQuizDiv !== undefined) {
+                prevCharacterDivs.unshift(curQuizDiv);
+            }
+            curCharacterIdx++;
+            curQuizDiv = acquireQuizDiv();
+            curQuizDiv.style.transition = 'none';
+            curQuizDiv.style.opacity = '1';
+            curQuizDiv.style['margin-left'] = -Math.floor(config.size / 2) + 'px';
+
+            var character = data.characters[curCharacterIdx];
+            var drawingColor = document.body.classList.contains('nightMode') ? STROKE_COLOR_NIGHT : STROKE_COLOR_DAY;
+            var toneColor = data.tones.length > 0 ? TONE_COLORS[data.tones[curCharacterIdx]] : drawingColor;
+
+            quizCharacter(character, toneColor, drawingColor, curQuizDiv);
+            requestCharacterData(data.characters.slice(curCharacterIdx + 1, curCharacterIdx + 1 + STREAM_LOOKAHEAD));
+
+            if (animation !== 'none') {
+                curQuizDiv.style.opacity = '0';
+                if (curCharacterIdx > 0 && animation === 'default') {
+                    curQuizDiv.style['margin-left'] = Math.floor(config.size / 2) + CHAR_SPACING + 'px';
                 }
             }
+
+            // a reused div jumps to its start position, only the way from there is animated
+            void curQuizDiv.offsetWidth;
+            curQuizDiv.style.transition = '';
+
+            if (animation !== 'none') {
+                // let webkit render the content before repositioning the new (new) character div. Otherwise the fade-in
+                // animation is ignored
+                setTimeout(function () {
+                    repositionDivs()
+                }, 50);
+            }
+        }
+    }
+
+    /**
+     * Returns a div for the next character: a free div of the pool, else the div of the oldest previous character if
+     * the pool is exhausted, else a new div
+     */
+    function acquireQuizDiv() {
+        var div;
+        if (freeDivs.length > 0) {
+            div = freeDivs.pop();
+        } else if (prevCharacterDivs.length >= POOL_SIZE) {
+            div = prevCharacterDivs.pop();
+        } else {
+            div = document.createElement("div");
+            targetDiv.append(div);
+        }
+        div.style.display = '';
+        return div;
+    }
+
+    /**
+     * Returns a div to the pool
+     */
+    function releaseQuizDiv(div) {
+        if (div.maobiWriter) div.maobiWriter.cancelQuiz();
+        div.style.display = 'none';
+        freeDivs.push(div);
+    }
+
+    /**
+     * Repositions all character divs (thereby triggering css animations)
+     */
+    function repositionDivs() {
+        prevCharacterDivs.forEach(function (div, idx) {
+            div.style['margin-left'] = Math.floor(-config.size / 2 - (config.size + CHAR_SPACING) * (idx + 1)) + 'px';
         });
+
+        curQuizDiv.style['margin-left'] = -Math.floor(config.size / 2) + 'px';
+        curQuizDiv.style.opacity = '1';
     }
-}
 
-/**
- * @return the computed color values of the tone colors
- */
-function getToneColors() {
-    var colors = {};
-    for (var i = 1; i <= 5; i++) {
-        var toneName = 'tone' + i;
-        var tmpSpan = document.createElement('span');
-        tmpSpan.className = toneName;
-        document.body.appendChild(tmpSpan);
-        var color = getComputedStyle(tmpSpan).color;
-        document.body.removeChild(tmpSpan);
-        colors[toneName] = color;
-    }
-    return colors;
-}
+    /**
+     * Calls onComplete with the stroke data of a character. Data that was neither inlined into the card nor is in the
+     * bundle of the deck is requested from Python, see `bridge.py`.
+     * @param character the character whose data is needed
+     * @param onComplete called with the stroke data
+     * @param onError called if Python has no data for the character
+     */
+    function loadCharacterData(character, onComplete, onError) {
+        if (data.charactersData[character] !== undefined) {
+            onComplete(data.charactersData[character]);
+            return;
+        }
 
-/**
- * Restarts the whole quiz (all characters
- */
-function restartQuiz() {
-    if (!restartQuizAnimationInProgress) {
-        if(curWriter) curWriter.cancelQuiz();
-        restartQuizAnimationInProgress = true;
-
-        // if no strokes of the current hanzi have been completed, we restart the whole quiz
-        if (completedStrokes === 0) {
-            // for convenience; applies a function on all character div elements (current and previous)
-            var applyAll = function (fn) {
-                if (curQuizDiv) fn(curQuizDiv);
-                for (var i = 0; i < prevCharacterDivs.length; i++) {
-                    fn(prevCharacterDivs[i]);
+        whenBundleLoaded(function () {
+            // the data may have been received while the bundle was loading
+            if (data.charactersData[character] !== undefined || takeBundledData(character)) {
+                onComplete(data.charactersData[character]);
+                return;
+            }
+
+            if (unavailableCharacters[character]) {
+                failCharacterLoad(onError, character);
+                return;
+            }
+
+            (pendingLoaders[character] = pendingLoaders[character] || []).push(
+                {onComplete: onComplete, onError: onError});
+            requestCharacterData([character]);
+        });
+    }
+
+    /**
+     * Requests the stroke data of characters which are neither inlined, nor bundled, nor already requested
+     * @param characters the characters whose data will be needed
+     */
+    function requestCharacterData(characters) {
+        whenBundleLoaded(function () {
+            var missing = characters.filter(function (c) {
+                return data.charactersData[c] === undefined && !takeBundledData(c) && !requestedCharacters[c];
+            });
+            if (missing.length > 0) {
+                sendCharacterRequest(missing);
+            }
+        });
+    }
+
+    /**
+     * Requests the stroke data of characters from Python. The loaders of characters that Python has no data for fail.
+     * @param missing the characters whose data is requested
+     */
+    function sendCharacterRequest(missing) {
+        missing.forEach(function (c) {
+            requestedCharacters[c] = true;
+        });
+
+        pycmd(STREAM_COMMAND + missing.join(''), function (received) {
+            missing.forEach(function (c) {
+                var loaders = pendingLoaders[c] || [];
+                delete pendingLoaders[c];
+
+                if (received && received[c] !== undefined) {
+                    data.charactersData[c] = JSON.parse(received[c]);
+                    loaders.forEach(function (loader) {
+                        loader.onComplete(data.charactersData[c]);
+                    });
+                    return;
                 }
-            };
 
-            applyAll(function (e) {
-                e.style.opacity = '0';
+                unavailableCharacters[c] = true;
+                loaders.forEach(function (loader) {
+                    failCharacterLoad(loader.onError, c);
+                });
+            });
+        });
+    }
+
+    /**
+     * Lets Hanzi Writer know that there is no data for a character, it then calls `onLoadCharDataError`
+     * @param onError the error callback of the loader, if any
+     * @param character the character without data
+     */
+    function failCharacterLoad(onError, character) {
+        if (onError) {
+            onError(new Error('character data not found: ' + character));
+        }
+    }
+
+    /**
+     * Starts the HanziWriter quiz for a given character. The writer of the div is reused if it has one, else it is
+     * created. `setCharacter` keeps the svg element of the writer, but replaces its renderer, which creates the
+     * strokes and masks of the new character (see `scripts/benchmark_quiz_pool.js`).
+     * @param character the character to quiz for
+     * @param toneColor color of the tone
+     * @param drawingColor color of the stroke the user draws
+     * @param targetDiv div that should be used for rendering the quiz
+     */
+    function quizCharacter(character, toneColor, drawingColor, targetDiv) {
+        completedStrokes = 0;
+
+        if (targetDiv.maobiWriter) {
+            curWriter = targetDiv.maobiWriter;
+            curWriter.setCharacter(character);
+            curWriter.updateColor('strokeColor', toneColor, {duration: 0});
+            curWriter.updateColor('drawingColor', drawingColor, {duration: 0});
+            curWriter.quiz(QUIZ_OPTIONS);
+            return;
+        }
+
+        curWriter = targetDiv.maobiWriter = HanziWriter.create(targetDiv, character, {
+            width: config.size,
+            height: config.size,
+            showCharacter: false,
+            showOutline: false,
+            highlightOnComplete: true,
+            leniency: config.leniency,
+            padding: 0,
+            delayBetweenStrokes: 200,
+            strokeColor: toneColor,
+            drawingColor: drawingColor,
+            drawingWidth: 5,
+            showHintAfterMisses: config.showHintAfterMisses || Number.MAX_SAFE_INTEGER, // setting showHintAfterMisses to
+            // false does not disable the feature
+            charDataLoader: function (char, onComplete, onError) {
+                loadCharacterData(char, onComplete, onError);
+            },
+            onLoadCharDataError: function (reason) {
+                console.log('Maobi: ' + (reason && reason.message ? reason.message : 'character data not found'));
+            },
+            onLoadCharDataSuccess: function () {
+                if (!firstRenderMeasured) {
+                    firstRenderMeasured = true;
+                    // the character is rendered right after its data was loaded, so this is the next frame
+                    requestAnimationFrame(function () {
+                        measure('first_render', 'shown');
+                    });
+                }
+            },
+        });
+        curWriter.quiz(QUIZ_OPTIONS);
+    }
+
+    /**
+     * Stops the quiz, reveals the current character, and animates it. Then starts the quiz for this character again
+     */
+    function revealCurrentCharacter() {
+        if (curWriter !== undefined && !restartQuizAnimationInProgress) {
+            var writer = curWriter;
+            logAbandonedStroke();
+            writer.showOutline();
+            writer.cancelQuiz();
+            completedStrokes = 0;
+            writer.animateCharacter({
+                onComplete: function (e) {
+                    if (!e.canceled) {
+                        // if the animation has been canceled, we do not need to hide
+                        setTimeout(function () {
+                            // the writer may have been reused for another character in the meantime
+                            if (writer !== curWriter) return;
+                            writer.hideCharacter();
+                            writer.quiz(QUIZ_OPTIONS);
+                        }, 1000);
+                    }
+                }
             });
+        }
+    }
 
-            // on complete after 300ms, which is the duration of the css animation
-            setTimeout(function () {
-                applyAll(function (e) {
-                    if (e.parentNode) e.parentNode.removeChild(e);
+    /**
+     * Calls callback once the bundle of the deck (see `export.py`) is loaded, or at once if the deck has no bundle.
+     * A bundle is loaded once and kept as long as the webview, which shows card after card.
+     * @param callback called when the bundled data can be used
+     */
+    function whenBundleLoaded(callback) {
+        if (!data.bundle) {
+            callback();
+            return;
+        }
+
+        // the bundle file name maps to true once it is loaded, else to the callbacks waiting for it
+        var bundles = window.maobiBundles = window.maobiBundles || {};
+        if (bundles[data.bundle] === true) {
+            callback();
+            return;
+        }
+
+        if (bundles[data.bundle] === undefined) {
+            bundles[data.bundle] = [];
+
+            var script = document.createElement('script');
+            script.src = data.bundle;
+            // if the bundle cannot be loaded, the data is requested from Python
+            script.onload = script.onerror = function () {
+                var callbacks = bundles[data.bundle];
+                bundles[data.bundle] = true;
+                callbacks.forEach(function (c) {
+                    c();
                 });
+            };
+            document.head.appendChild(script);
+        }
 
-                curCharacterIdx = -1;
-                curWriter = undefined;
-                curQuizDiv = undefined;
-                completedStrokes = 0;
-                prevCharacterDivs = [];
+        bundles[data.bundle].push(callback);
+    }
 
-                restartQuizAnimationInProgress = false;
-                quizNextCharacter('default');
-            }, 300);
-        } else {
-            // if some strokes of the current hanzi have been completed, only restart the current hanzi quiz
-            curQuizDiv.style.opacity = '0';
-            setTimeout(function(){
-                if (curQuizDiv.parentNode) curQuizDiv.parentNode.removeChild(curQuizDiv);
-                curCharacterIdx -= 1;
-                curQuizDiv = undefined;
-                completedStrokes = 0;
+    /**
+     * Copies the data of a character from the loaded bundles into the data of this quiz. Cards without a bundle do not
+     * use bundles loaded by earlier cards, which may be outdated, see `get_bundle`.
+     * @param character the character whose data is needed
+     * @return whether the character was bundled
+     */
+    function takeBundledData(character) {
+        var bundled = data.bundle && window.maobiCharacters && window.maobiCharacters[character];
+        if (!bundled) {
+            return false;
+        }
+
+        data.charactersData[character] = bundled;
+        return true;
+    }
 
-                restartQuizAnimationInProgress = false;
-                quizNextCharacter('opacity');
-            }, 300);
+    /**
+     * Sets a performance mark, only in debug mode
+     * @param name name of the mark
+     */
+    function mark(name) {
+        if (config.debug) {
+            performance.mark(MARK_PREFIX + name);
         }
     }
-}
 
+    /**
+     * Measures the time since a performance mark and queues it to be sent to Python, only in debug mode
+     * @param name name of the timing, recorded as phase `client.<name>` in Python
+     * @param startMark name of the mark at which the timing starts
+     */
+    function measure(name, startMark) {
+        if (!config.debug) {
+            return;
+        }
 
-// Init
-// If there is no quiz div, we cannot start maobi
-if (targetDiv) {
-    quizNextCharacter('none');
+        performance.measure(MARK_PREFIX + name, MARK_PREFIX + startMark);
+        var entries = performance.getEntriesByName(MARK_PREFIX + name, 'measure');
+        performance.clearMeasures(MARK_PREFIX + name);
+        performance.clearMarks(MARK_PREFIX + startMark);
 
-    if (revealButton) {
-        var revealButtonInnerBtn = document.createElement("button");
-        revealButtonInnerBtn.textContent = revealButton.getAttribute("label") || 'Reveal';
-        revealButton.append(revealButtonInnerBtn);
+        timingsBatch.add([name, entries[entries.length - 1].duration]);
+    }
 
-        revealButtonInnerBtn.addEventListener('click', function () {
-            revealCurrentCharacter();
-        });
+    /**
+     * Creates a batch of entries that are sent to Python together, see `bridge.py`
+     * @param command the bridge command, which is followed by the entries as JSON
+     * @param toMessage converts the list of entries into the object that is sent
+     * @return an object with `add(entry)` to add an entry
+     */
+    function createBatch(command, toMessage) {
+        var entries = [];
+        var timeout = undefined;
+
+        function send() {
+            clearTimeout(timeout);
+            timeout = undefined;
+
+            if (entries.length > 0) {
+                pycmd(command + JSON.stringify(toMessage(entries)));
+                entries = [];
+            }
+        }
+
+        return {
+            add: function (entry) {
+                entries.push(entry);
+                if (entries.length >= BATCH_SIZE) {
+                    send();
+                } else if (timeout === undefined) {
+                    timeout = setTimeout(send, BATCH_DELAY);
+                }
+            },
+        };
     }
 
-    if (restartButton) {
-        var restartButtonInnerBtn = document.createElement("button");
-        restartButtonInnerBtn.textContent = restartButton.getAttribute("label") || 'Restart Quiz';
-        restartButton.append(restartButtonInnerBtn);
+    /**
+     * Queues a stroke to be recorded in the stroke log (see `strokes.py`) if `config.logStrokes` is set
+     * @param data the stroke data passed by HanziWriter to `onCorrectStroke` or `onMistake`
+     * @param accepted whether the stroke was accepted, else it was revealed or left unfinished after mistakes
+     */
+    function logStroke(data, accepted) {
+        if (config.logStrokes) {
+            var hint = config.showHintAfterMisses > 0 && data.mistakesOnStroke >= config.showHintAfterMisses;
+            strokesBatch.add([data.character, data.strokeNum, data.mistakesOnStroke, hint, accepted]);
+        }
+    }
 
-        restartButtonInnerBtn.addEventListener('click', function () {
-            restartQuiz();
-        });
+    /**
+     * Records the mistakes on the current stroke if it is given up before it was accepted
+     */
+    function logAbandonedStroke() {
+        if (mistakenStroke !== undefined) {
+            logStroke(mistakenStroke, false);
+            mistakenStroke = undefined;
+        }
     }
-} else {
-    console.log('Maobi: target div not found: #' + config.targetDiv);
-}
\ No newline at end of file
+
+    /**
+     * Measures the time from the end of a stroke until HanziWriter graded it
+     */
+    function measureStrokeGrading() {
+        if (strokeEndMarked) {
+            strokeEndMarked = false;
+            measure('stroke_grading', 'stroke_end');
+        }
+    }
+
+    /**
+     * @return the computed color values of the tone colors
+     */
+    function getToneColors() {
+        var colors = {};
+        for (var i = 1; i <= 5; i++) {
+            var toneName = 'tone' + i;
+            var tmpSpan = document.createElement('span');
+            tmpSpan.className = toneName;
+            document.body.appendChild(tmpSpan);
+            var color = getComputedStyle(tmpSpan).color;
+            document.body.removeChild(tmpSpan);
+            colors[toneName] = color;
+        }
+        return colors;
+    }
+
+    /**
+     * Restarts the whole quiz (all characters
+     */
+    function restartQuiz() {
+        if (!restartQuizAnimationInProgress) {
+            if(curWriter) curWriter.cancelQuiz();
+            logAbandonedStroke();
+            restartQuizAnimationInProgress = true;
+
+            // if no strokes of the current hanzi have been completed, we restart the whole quiz
+            if (completedStrokes === 0) {
+                // for convenience; applies a function on all character div elements (current and previous)
+                var applyAll = function (fn) {
+                    if (curQuizDiv) fn(curQuizDiv);
+                    for (var i = 0; i < prevCharacterDivs.length; i++) {
+                        fn(prevCharacterDivs[i]);
+                    }
+                };
+
+                applyAll(function (e) {
+                    e.style.opacity = '0';
+                });
+
+                // on complete after 300ms, which is the duration of the css animation
+                setTimeout(function () {
+                    applyAll(releaseQuizDiv);
+
+                    curCharacterIdx = -1;
+                    curWriter = undefined;
+                    curQuizDiv = undefined;
+                    completedStrokes = 0;
+                    prevCharacterDivs = [];
+
+                    restartQuizAnimationInProgress = false;
+                    quizNextCharacter('default');
+                }, 300);
+            } else {
+                // if some strokes of the current hanzi have been completed, only restart the current hanzi quiz
+                curQuizDiv.style.opacity = '0';
+                setTimeout(function(){
+                    releaseQuizDiv(curQuizDiv);
+                    curCharacterIdx -= 1;
+                    curQuizDiv = undefined;
+                    completedStrokes = 0;
+
+                    restartQuizAnimationInProgress = false;
+                    quizNextCharacter('opacity');
+                }, 300);
+            }
+        }
+    }
+
+
+    // Init
+    // If there is no quiz div, we cannot start maobi
+    if (targetDiv) {
+        if (config.debug) {
+            // captured before the stroke is graded by the listener HanziWriter adds to the document
+            ['mouseup', 'touchend'].forEach(function (type) {
+                targetDiv.addEventListener(type, function () {
+                    strokeEndMarked = true;
+                    mark('stroke_end');
+                }, true);
+            });
+        }
+
+        quizNextCharacter('none');
+
+        // Anki replaces the children of #qa when the answer or the next card is shown, an unfinished stroke is then
+        // given up
+        var qaDiv = document.getElementById('qa');
+        if (config.logStrokes && qaDiv && window.MutationObserver) {
+            var observer = new MutationObserver(function () {
+                if (!qaDiv.contains(targetDiv)) {
+                    observer.disconnect();
+                    logAbandonedStroke();
+                }
+            });
+            observer.observe(qaDiv, {childList: true});
+        }
+
+        if (revealButton) {
+            var revealButtonInnerBtn = document.createElement("button");
+            revealButtonInnerBtn.textContent = revealButton.getAttribute("label") || 'Reveal';
+            revealButton.append(revealButtonInnerBtn);
+
+            revealButtonInnerBtn.addEventListener('click', function () {
+                revealCurrentCharacter();
+            });
+        }
+
+        if (restartButton) {
+            var restartButtonInnerBtn = document.createElement("button");
+            restartButtonInnerBtn.textContent = restartButton.getAttribute("label") || 'Restart Quiz';
+            restartButton.append(restartButtonInnerBtn);
+
+            restartButtonInnerBtn.addEventListener('click', function () {
+                restartQuiz();
+            });
+        }
+    } else {
+        console.log('Maobi: target div not found: #' + config.targetDiv);
+    }
+}
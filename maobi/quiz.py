@@ -1,23 +1,26 @@
+import hashlib
 import json
 import os
 import re
+import time
+from functools import lru_cache
 from string import Template
-from urllib.parse import quote
-from zipfile import ZipFile
 
 from anki.cards import Card
-from anki.utils import stripHTML
 from aqt import mw
 
+from .bundle import get_bundle
 from .config import DeckConfig, GridType, MaobiConfig
-from .util import debug, error
+from .extract import tokenize_characters
+from .grid import GridStyle, grid_data_uri
+from .store import get_character_store
+from .timing import start_timer
+from .util import LRUCache, debug, error
+from .variants import find_variant
 
 PATH_MAOBI = os.path.dirname(os.path.realpath(__file__))
 PATH_HANZI_WRITER = os.path.join(PATH_MAOBI, "hanzi-writer.min.js")
 PATH_QUIZ_JS = os.path.join(PATH_MAOBI, "quiz.js")
-PATH_CHARACTERS = os.path.join(PATH_MAOBI, "characters.zip")
-PATH_RICE_GRID = os.path.join(PATH_MAOBI, "rice.svg")
-PATH_FIELD_GRID = os.path.join(PATH_MAOBI, "field.svg")
 
 TARGET_DIV = "character-target-div"
 REVEAL_BUTTON = "reveal-character-btn"
@@ -55,9 +58,7 @@ $styles
 
 $html
 
-<script>
-$hanzi_writer_script
-</script>
+$scripts
 
 <script>
 onShownHook.push(function () {
@@ -68,20 +69,54 @@ onShownHook.push(function () {
         revealButton: '$reveal_button',
         restartButton: '$restart_button',
         showHintAfterMisses: $show_hint_after_misses,
+        debug: $debug,
+        logStrokes: $log_strokes,
     };
     
     var data = {
         characters: $characters,
         tones: $tones,
-        charactersData: ($characters_data).map(JSON.parse),
+        charactersData: $characters_data,
+        bundle: $bundle,
     };
 
-    $maobi_quiz_script
+    maobiQuiz(config, data);
 });
 </script>
 """
 )
 
+INLINE_SCRIPT_TEMPLATE = Template(
+    """
+<script>
+$script
+</script>
+"""
+)
+
+WEB_EXPORT_SCRIPT_TEMPLATE = Template(
+    """
+<script src="/_addons/$addon_package/$file_name?v=$content_hash"></script>
+"""
+)
+
+SCRIPTS = [PATH_HANZI_WRITER, PATH_QUIZ_JS]
+
+# The values of `TEMPLATE` that differ from card to card
+CARD_FIELDS = ["html", "bundle", "characters", "tones", "characters_data"]
+
+# Contexts in which the characters are rendered as static SVG if `static_preview` is enabled
+STATIC_PREVIEW_CONTEXTS = {"previewQuestion", "clayoutQuestion"}
+
+# Number of notes for which the extracted characters are kept
+NOTE_CACHE_SIZE = 2000
+
+_web_exports_registered = False
+_compiled_templates_config = None
+
+# Maps (note id, note mod time, field name) to (field content, characters, tones)
+_note_cache = LRUCache(NOTE_CACHE_SIZE)
+
 
 class MaobiException(Exception):
     def __init__(self, message):
@@ -93,13 +128,19 @@ def maobi_review_hook(html: str, card: Card, context: str) -> str:
     if context not in {"reviewQuestion", "clayoutQuestion", "previewQuestion"}:
         return html
 
+    start = time.perf_counter()
+
     # This reads from the config.json in the addon folder
     maobi_config = MaobiConfig.load()
 
+    # Phases are only timed in debug mode
+    timer = start_timer(maobi_config.debug, "review", start)
+
     # Search the active deck configuration
     deck_name = mw.col.decks.current()["name"]
     template_name = card.template()["name"]
     config = maobi_config.search_active_deck_config(deck_name, template_name)
+    timer.phase("config")
 
     # Return if we did not find it
     if not config:
@@ -113,46 +154,166 @@ def maobi_review_hook(html: str, card: Card, context: str) -> str:
     # Get the character to write and the corresponding character data
     try:
         characters, tones = _get_characters(card, config)
-        characters_data = [_load_character_data(c) for c in characters]
+        timer.phase("characters")
+
+        substitutes = {}
+        if config.variant_fallback:
+            characters, substitutes = _substitute_variants(characters)
+            if substitutes:
+                html = _build_variant_notice(html, substitutes)
+
+        # Cards that are only looked at get the characters as static SVG instead of the quiz
+        if maobi_config.static_preview and context in STATIC_PREVIEW_CONTEXTS:
+            from .preview import render_static_preview
+
+            result = render_static_preview(
+                html, characters, tones, config, maobi_config.grid_style
+            )
+            timer.phase("preview")
+            timer.done()
+            return result
+
+        # Characters exported to the media folder are loaded from there, see `export.py`
+        bundle = get_bundle(config)
+        characters_data = _build_characters_data(
+            characters,
+            maobi_config.stream_after,
+            bundle.characters if bundle is not None else frozenset(),
+        )
+        timer.phase("character_data")
     except MaobiException as e:
         debug(maobi_config, str(e))
         return _build_error_message(html, str(e))
 
+    # Everything but the card specific values is rendered once per configuration
+    inline_scripts = not _web_exports_registered or maobi_config.inline_scripts
+    template = _compile_template(
+        maobi_config, config, inline_scripts, context == "reviewQuestion"
+    )
+    timer.phase("template")
+
+    # Render the template
+    data = {
+        "html": html,
+        "bundle": json.dumps(bundle.file_name if bundle is not None else None),
+        "characters": json.dumps(characters),
+        "tones": json.dumps(tones),
+        "characters_data": characters_data,
+    }
+
+    result = _render_template(template, data)
+    timer.phase("render")
+    timer.done()
+
+    # The stats are only built in debug mode, the store needs its lock for them
+    if maobi_config.debug:
+        debug(maobi_config, f"Note cache: {_note_cache.stats()}")
+        debug(maobi_config, f"Character cache: {get_character_store().stats()}")
+
+    return result
+
+
+def read_assets():
+    """Reads the JavaScript assets and their content hashes ahead of the first card. Only fills
+    thread-safe caches, so this can run in a background thread."""
+    for path in SCRIPTS:
+        _content_hash(path)
+
+
+def compile_templates(maobi_config: MaobiConfig):
+    """Compiles the review templates of all enabled configs ahead of the first card. Must run on
+    the main thread, as it replaces the compiled templates."""
+    inline_scripts = not _web_exports_registered or maobi_config.inline_scripts
+    for config in maobi_config.decks.values():
+        if config.enabled:
+            _compile_template(maobi_config, config, inline_scripts, True)
+
+
+def _compile_template(
+    maobi_config: MaobiConfig, config: DeckConfig, inline_scripts: bool, review: bool
+) -> list:
+    """Returns the precompiled template for `config`, see `_build_template`. Strokes are only
+    logged in the review, not in the previews. Compiled templates are dropped when the config is
+    changed."""
+    global _compiled_templates_config
+
+    if maobi_config is not _compiled_templates_config:
+        _build_template.cache_clear()
+        _compiled_templates_config = maobi_config
+
+    return _build_template(
+        config.grid,
+        maobi_config.grid_style,
+        config.size,
+        config.leniency,
+        config.show_hint_after_misses,
+        inline_scripts,
+        maobi_config.debug,
+        maobi_config.log_strokes and review,
+    )
+
+
+@lru_cache(maxsize=64)
+def _build_template(
+    grid: GridType,
+    grid_style: GridStyle,
+    size: int,
+    leniency: int,
+    show_hint_after_misses: int,
+    inline_scripts: bool,
+    debug: bool,
+    log_strokes: bool,
+) -> list:
+    """Renders everything in `TEMPLATE` which does not depend on the card.
+
+    Returns:
+        template (list[str]): Alternating literal text and names of the card specific values
+        (`CARD_FIELDS`), starting and ending with literal text.
+
+    """
+
     # Style the character div depending on the configuration
     styles = []
 
     # Add the background grid
-    hanzi_grid = _build_hanzi_grid_style(config.grid)
+    hanzi_grid = _build_hanzi_grid_style(grid, grid_style)
     styles.append(hanzi_grid)
 
-    # Load the hanzi writer JavaScript
-    with open(PATH_HANZI_WRITER, "r") as f:
-        hanzi_writer_script = f.read()
+    # Reference the hanzi writer and maobi quiz JavaScript
+    if inline_scripts:
+        scripts = _build_inline_scripts()
+    else:
+        scripts = _build_web_export_scripts()
 
-    # Load the maobi quiz JavaScript
-    with open(PATH_QUIZ_JS, "r") as f:
-        maobi_quiz_script = f.read()
-
-    # Render the template
     data = {
-        "html": html,
-        "hanzi_writer_script": hanzi_writer_script,
-        "maobi_quiz_script": maobi_quiz_script,
+        "scripts": scripts,
         "target_div": TARGET_DIV,
         "reveal_button": REVEAL_BUTTON,
         "restart_button": RESTART_BUTTON,
-        "characters": characters,
-        "tones": tones,
-        "characters_data": characters_data,
-        "size": config.size,
-        "leniency": config.leniency / 100.0,
-        "show_hint_after_misses": config.show_hint_after_misses,
+        "size": size,
+        "leniency": leniency / 100.0,
+        "show_hint_after_misses": show_hint_after_misses,
+        "debug": json.dumps(debug),
+        "log_strokes": json.dumps(log_strokes),
         "styles": "\n".join(styles),
     }
 
-    result = TEMPLATE.substitute(data)
+    # Card specific values are replaced by markers at which the template is split
+    for name in CARD_FIELDS:
+        data[name] = f"\0{name}\0"
 
-    return result
+    rendered = TEMPLATE.substitute(data)
+
+    return re.split("\0(" + "|".join(CARD_FIELDS) + ")\0", rendered)
+
+
+def _render_template(template: list, data: dict) -> str:
+    """Fills the card specific values `data` into the precompiled `template`."""
+    parts = template[:]
+    for i in range(1, len(parts), 2):
+        parts[i] = str(data[parts[i]])
+
+    return "".join(parts)
 
 
 def _get_characters(card: Card, config: DeckConfig) -> tuple:
@@ -181,34 +342,99 @@ def _get_characters(card: Card, config: DeckConfig) -> tuple:
         )
 
     characters_html = note[field_name]
-    characters = stripHTML(characters_html)
-
-    # extract tones, if possible
-    tones = []
-    if "span" in characters_html:
-        # this is the 'colors' field which has tone information as tone1...4 css classes
-        tones = list(re.findall("tone[12345]", characters_html))
-    if len(tones) != len(characters):
-        tones = []
-
-    # filter out non-chinese characters
-    non_chinese_chars = re.finditer(r"[^\u4E00-\u9FD0]", characters)
-    characters_list = list(characters)
-    for char_match in reversed(list(non_chinese_chars)):
-        del_idx = char_match.start()
-        del characters_list[del_idx]
-        if len(tones) > 0:
-            del tones[del_idx]
+
+    # Sibling cards and cards shown again do not need to extract the characters again. The field
+    # content is compared as well, as the mod time only has a resolution of seconds.
+    key = (note.id, note.mod, field_name)
+    cached = _note_cache.get(key)
+    if cached is not None and cached[0] == characters_html:
+        return list(cached[1]), list(cached[2])
+
+    characters, tones = extract_characters(characters_html, field_name)
+    _note_cache.put(key, (characters_html, tuple(characters), tuple(tones)))
+
+    return characters, tones
+
+
+def extract_characters(characters_html: str, field_name: str) -> tuple:
+    """Extracts the characters to write from the field content `characters_html`, see
+    `tokenize_characters`. This does not access the collection and can therefore be run outside
+    the main thread.
+
+    Returns:
+        characters (tuple[list[str], list[str])): The characters contained in `characters_html`,
+        and possibly the tones (extracted from css classes)
+
+    Raises:
+        MaobiException: If the field called `field_name` is empty.
+
+    """
+
+    characters, tones = tokenize_characters(characters_html)
 
     # Check that the character is one or more characters
-    if len(characters_list) == 0:
+    if len(characters) == 0:
         raise MaobiException(f"Field '{field_name}' was empty!")
 
-    return [c for c in characters_list], tones
+    return characters, tones
+
+
+def _substitute_variants(characters: list) -> tuple:
+    """Replaces characters without data by a graphically equivalent character with data, see
+    `variants.py`. Characters without such a variant are kept, they are reported as not found.
+
+    Returns:
+        characters (tuple[list[str], dict[str, str]]): The characters to write and the replaced
+        characters mapped to their substitute.
+
+    """
+    store = get_character_store()
+
+    substitutes = {}
+    result = []
+    for c in characters:
+        if c not in substitutes and c not in store:
+            variant = find_variant(c)
+            if variant is not None:
+                substitutes[c] = variant
+
+        result.append(substitutes.get(c, c))
+
+    return result, substitutes
+
+
+def _build_characters_data(
+    characters: list, stream_after: int, bundled: frozenset = frozenset()
+) -> str:
+    """Builds a JavaScript object that maps each distinct character in `characters` to its
+    character data. The character data already is JSON, so it is inserted as is.
+
+    If `stream_after` is positive, only the data of the first `stream_after` distinct characters
+    is included. `quiz.js` requests the rest while the quiz progresses, see `bridge.py`.
+    Characters in `bundled` are left out, their data is in the bundle of the deck.
+
+    Raises:
+        MaobiException: If data for a character was not found.
+
+    """
+    store = get_character_store()
+
+    entries = []
+    distinct = [c for c in dict.fromkeys(characters) if c not in bundled]
+    for i, c in enumerate(distinct):
+        if 0 < stream_after <= i:
+            # Fail now instead of when the character is reached
+            if c not in store:
+                raise MaobiException(f"Character '{c}' not found!")
+            continue
+
+        entries.append(f"{json.dumps(c)}: {_load_character_data(c)}")
+
+    return "{" + ", ".join(entries) + "}"
 
 
 def _load_character_data(character: str) -> str:
-    """Reads the character data for `character` from `characters.zip`.
+    """Reads the character data for `character` from the character store.
 
     Returns:
         character_data (str): The character data for `character`.
@@ -218,46 +444,97 @@ def _load_character_data(character: str) -> str:
 
     """
 
-    # Open the zip file and read a single characters' data directly without extracting everything
-    with ZipFile(PATH_CHARACTERS, "r") as myzip:
-        try:
-            with myzip.open(f"data/{character}.json") as f:
-                character_data = f.read().decode("utf-8")
-                return character_data
-        except Exception:
-            raise MaobiException(f"Character '{character}' not found!")
+    character_data = get_character_store().get(character)
+    if character_data is None:
+        raise MaobiException(f"Character '{character}' not found!")
 
+    return character_data
 
-def _build_hanzi_grid_style(grid_type: GridType) -> str:
-    """Generate the JavaScript snippet that sets the background specified by `background_type`.
 
-    Right now, legal values for `background_type` are "rice" or "field". The SVG itself is generated
-    with `scripts/generate_hanzi_grids.py`.
-    """
+def _build_hanzi_grid_style(grid_type: GridType, grid_style: GridStyle) -> str:
+    """Generates the CSS that sets the background grid `grid_type` drawn with `grid_style` and
+    the border of the character divs. The grid itself is built by `grid.py`."""
 
-    backgrounds = {"rice": PATH_RICE_GRID, "field": PATH_FIELD_GRID}
-
-    # Do nothing for unknown background type
-    if grid_type.name not in backgrounds:
-        return ""
+    rules = [f"outline-width: {grid_style.border_width}px;"]
 
     # We use CSS here to set the style, as it seems the easiest. I considered using inline CSS
     # style directly, but that seemed less maintainable to generate. I also tried
     # `background-size: covered;` , but that made the image cut off at the right side.
+    data_uri = grid_data_uri(grid_type.name, grid_style)
+    if data_uri:
+        rules.append(f"background: url('{data_uri}');")
+        rules.append("background-size: 100% 100%;")
+
     style = Template(
         """
 #$target_div > div {
-    background: url('data:image/svg+xml;charset=utf8,$svg_data');
-    background-size: 100% 100%;
+    $rules
 }
 """
     )
 
-    # Load the SVG data
-    with open(backgrounds[grid_type.name]) as f:
-        svg_data = f.read()
+    return style.substitute(target_div=TARGET_DIV, rules="\n    ".join(rules))
+
+
+def register_web_exports():
+    """Allows the webview to load our JavaScript files from the add-on folder. The webview can
+    then cache them across cards instead of parsing them again for every card."""
+    global _web_exports_registered
+
+    # Only available in newer Anki versions, else we inline the scripts
+    if not hasattr(mw.addonManager, "setWebExports"):
+        return
+
+    names = "|".join(re.escape(os.path.basename(path)) for path in SCRIPTS)
+    mw.addonManager.setWebExports(__name__, rf"({names})")
+    _web_exports_registered = True
+
+
+def _build_web_export_scripts() -> str:
+    """Generates `<script src>` tags for the web exported JavaScript files. The content hash in
+    the URL makes the webview load the new version after an update."""
+    addon_package = mw.addonManager.addonFromModule(__name__)
+
+    scripts = []
+    for path in SCRIPTS:
+        script = WEB_EXPORT_SCRIPT_TEMPLATE.substitute(
+            addon_package=addon_package,
+            file_name=os.path.basename(path),
+            content_hash=_content_hash(path),
+        )
+        scripts.append(script)
+
+    return "".join(scripts)
+
+
+def _build_inline_scripts() -> str:
+    """Generates `<script>` tags which contain the JavaScript files themselves. This is used where
+    web exports are not available."""
+    return "".join(
+        INLINE_SCRIPT_TEMPLATE.substitute(script=_read_asset(path)) for path in SCRIPTS
+    )
+
+
+@lru_cache(maxsize=None)
+def _read_asset(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
 
-    return style.substitute(target_div=TARGET_DIV, svg_data=quote(svg_data))
+
+@lru_cache(maxsize=None)
+def _content_hash(path: str) -> str:
+    return hashlib.sha1(_read_asset(path).encode("utf-8")).hexdigest()[:10]
+
+
+def _build_variant_notice(html: str, substitutes: dict) -> str:
+    """Constructs the HTML for a notice which characters in `substitutes` were replaced by which
+    variant over the original html."""
+    replaced = ", ".join(f"{v} for {c}" for c, v in substitutes.items())
+    return f"""<p style="text-align: center; color: grey; font-size: small;">
+Maobi shows variants of characters without stroke data: {replaced}
+</p>
+{html}
+"""
 
 
 def _build_error_message(html: str, message: str) -> str:
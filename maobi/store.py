@@ -0,0 +1,306 @@
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Optional
+from zipfile import ZipFile
+
+from .pack import CharacterPack
+from .util import LRUCache, error
+
+PATH_MAOBI = os.path.dirname(os.path.realpath(__file__))
+PATH_CHARACTERS = os.path.join(PATH_MAOBI, "characters.zip")
+PATH_CHARACTER_PACK = os.path.join(PATH_MAOBI, "characters.pack")
+PATH_OVERLAY = os.path.join(PATH_MAOBI, "user_files", "characters")
+
+# Seconds after which the overlay directory is checked for changed files
+OVERLAY_RESCAN_INTERVAL = 2.0
+
+# Upper bound for the decompressed character data kept in memory. One character is a few KB,
+# so this keeps roughly a thousand characters around.
+DEFAULT_CACHE_SIZE = 4 * 1024 * 1024
+
+# Versions of the overlay, unique across all overlays so that a reopened store never repeats one
+_overlay_versions = itertools.count()
+
+
+class CharacterZip:
+    """CharacterZip reads character data from `characters.zip`, which contains one member
+    `data/{character}.json` per character. The member index is built once."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = ZipFile(path, "r")
+
+        # Map the character to its member so that lookups skip the name resolution of `ZipFile`
+        self._index = {}
+        for info in self._zip.infolist():
+            name = info.filename
+            if name.startswith("data/") and name.endswith(".json"):
+                self._index[name[len("data/") : -len(".json")]] = info
+
+    def get(self, character: str) -> Optional[str]:
+        info = self._index.get(character)
+        if info is None:
+            return None
+
+        with self._zip.open(info) as f:
+            return f.read().decode("utf-8")
+
+    def __contains__(self, character: str) -> bool:
+        return character in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        self._zip.close()
+
+
+class CharacterOverlay:
+    """CharacterOverlay reads character data that the user put into `user_files/characters` as
+    `{character}.json` in the Hanzi Writer format, e.g. for missing characters or corrected
+    strokes. The files are few, so they are read when the directory is indexed.
+
+    The directory is indexed once and checked again at most every `rescan_interval` seconds.
+    Only files with a changed mtime are read again. `user_files` is kept by Anki when the add-on
+    is updated.
+
+    Only one thread rescans at a time, the others keep using the current index, which is replaced
+    at once. Lookups therefore never wait for the directory.
+    """
+
+    def __init__(self, path: str, rescan_interval: float = OVERLAY_RESCAN_INTERVAL):
+        self.path = path
+        self._rescan_interval = rescan_interval
+
+        # Maps the character to (mtime of its file, character data or `None` if it is invalid)
+        self._index = {}
+        self._next_scan = 0.0
+        self._scan_lock = threading.Lock()
+        self._version = next(_overlay_versions)
+
+    @property
+    def version(self) -> int:
+        """Changes whenever files were added, changed or removed."""
+        self._check()
+        return self._version
+
+    def get(self, character: str) -> Optional[str]:
+        self._check()
+        entry = self._index.get(character)
+        return entry[1] if entry is not None else None
+
+    def mtimes(self, characters) -> dict:
+        """Returns the mtime of the file of each of `characters` that is in the overlay."""
+        self._check()
+        return {
+            c: mtime
+            for c, (mtime, character_data) in self._index.items()
+            if character_data is not None and c in characters
+        }
+
+    def __contains__(self, character: str) -> bool:
+        return self.get(character) is not None
+
+    def __len__(self) -> int:
+        self._check()
+        return sum(1 for _, character_data in self._index.values() if character_data)
+
+    def _check(self):
+        now = time.monotonic()
+        if now >= self._next_scan and self._scan_lock.acquire(blocking=False):
+            try:
+                self._next_scan = now + self._rescan_interval
+                self._scan()
+            finally:
+                self._scan_lock.release()
+
+    def _scan(self):
+        try:
+            entries = list(os.scandir(self.path))
+        except FileNotFoundError:
+            entries = []
+
+        index = {}
+        changed = False
+        for entry in entries:
+            character, ext = os.path.splitext(entry.name)
+            if ext != ".json" or len(character) != 1 or not entry.is_file():
+                continue
+
+            mtime = entry.stat().st_mtime_ns
+            old = self._index.get(character)
+            if old is not None and old[0] == mtime:
+                index[character] = old
+            else:
+                index[character] = (mtime, self._read(entry.path))
+                changed = True
+
+        # Files were added or changed, or some were removed
+        if changed or len(index) != len(self._index):
+            self._index = index
+            self._version = next(_overlay_versions)
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                character_data = f.read()
+            parsed = json.loads(character_data)
+            if "strokes" not in parsed or "medians" not in parsed:
+                raise ValueError("'strokes' or 'medians' is missing")
+        except (OSError, ValueError, TypeError) as e:
+            error(f"Ignoring invalid character data in {path}: {e}")
+            return None
+
+        return character_data
+
+
+class CharacterStore:
+    """CharacterStore gives access to the stroke data.
+
+    The data is read from `characters.pack` (see `pack.py`) and, if that is missing, from
+    `characters.zip`. The file is opened once. Character data is kept in a size-bounded LRU
+    cache. Data in the overlay directory (see `CharacterOverlay`) takes priority over both, it is
+    looked up without the lock of the store. The store can be used from several threads.
+    """
+
+    def __init__(
+        self,
+        pack_path: str = PATH_CHARACTER_PACK,
+        zip_path: str = PATH_CHARACTERS,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        overlay_path: str = PATH_OVERLAY,
+    ):
+        self.pack_path = pack_path
+        self.zip_path = zip_path
+
+        self._lock = threading.RLock()
+        self._source = None
+        self._data_version = None
+        self._overlay = CharacterOverlay(overlay_path)
+        self._cache = LRUCache(max_size, sizeof=len)
+        self._overlay_hits = 0
+
+    def get(self, character: str) -> Optional[str]:
+        """Returns the character data for `character` or `None` if there is none."""
+        character_data = self._overlay.get(character)
+
+        with self._lock:
+            if character_data is not None:
+                self._overlay_hits += 1
+                return character_data
+
+            character_data = self._cache.get(character)
+            if character_data is not None:
+                return character_data
+
+            character_data = self._read(character)
+            if character_data is not None:
+                self._cache.put(character, character_data)
+            return character_data
+
+    def prefetch(self, characters) -> int:
+        """Loads the data of `characters` into the cache, unless it is cached already or in the
+        overlay. Unlike `get`, this is not counted in the stats, so that they only reflect the
+        lookups of the cards shown. Returns the number of characters loaded."""
+        count = 0
+        for character in characters:
+            if character in self._overlay:
+                continue
+
+            with self._lock:
+                if character in self._cache:
+                    continue
+
+                character_data = self._read(character)
+                if character_data is not None:
+                    self._cache.put(character, character_data)
+                    count += 1
+
+        return count
+
+    def __contains__(self, character: str) -> bool:
+        if character in self._overlay:
+            return True
+
+        with self._lock:
+            return character in self._cache or character in self._open()
+
+    def overlay_version(self) -> int:
+        """Returns the version of the overlay, see `CharacterOverlay.version`. Data derived from
+        the character data needs to be rebuilt when it changes."""
+        return self._overlay.version
+
+    def data_version(self) -> str:
+        """Returns the version of the data file, its name, size and mtime. Data derived from the
+        character data, like the exported bundles, is stale once it changes."""
+        with self._lock:
+            self._open()
+            return self._data_version
+
+    def overlay_mtimes(self, characters) -> dict:
+        """Returns the mtime of the overlay file of each of `characters` that has one."""
+        return self._overlay.mtimes(characters)
+
+    def open(self):
+        """Opens the data file now instead of on first use."""
+        with self._lock:
+            self._open()
+
+    def close(self):
+        """Closes the data file and drops all cached data. The store reopens itself on next use."""
+        with self._lock:
+            if self._source is not None:
+                self._source.close()
+            self._source = None
+            self._data_version = None
+            self._overlay = CharacterOverlay(self._overlay.path)
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """Returns the stats of the cache and the number of lookups served by the overlay."""
+        with self._lock:
+            return dict(self._cache.stats(), overlay_hits=self._overlay_hits)
+
+    def _open(self):
+        if self._source is None:
+            if os.path.exists(self.pack_path):
+                self._source = CharacterPack(self.pack_path)
+                path = self.pack_path
+            else:
+                self._source = CharacterZip(self.zip_path)
+                path = self.zip_path
+
+            stat = os.stat(path)
+            self._data_version = (
+                f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+            )
+
+        return self._source
+
+    def _read(self, character: str) -> Optional[str]:
+        return self._open().get(character)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_character_store() -> CharacterStore:
+    """Returns the process-wide character store."""
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = CharacterStore()
+        return _store
+
+
+def close_character_store(*args):
+    """Closes the process-wide character store, e.g. when the profile is closed or the add-on is
+    updated. Accepts and ignores hook arguments."""
+    with _store_lock:
+        if _store is not None:
+            _store.close()
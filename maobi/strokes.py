@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import threading
+import time
+
+PATH_MAOBI = os.path.dirname(os.path.realpath(__file__))
+PATH_STROKE_LOG = os.path.join(PATH_MAOBI, "user_files", "strokes.sqlite")
+
+# Buffered strokes are written after this many seconds...
+FLUSH_INTERVAL = 5.0
+
+# ...or as soon as this many strokes are buffered
+FLUSH_SIZE = 200
+
+# Characters shown by `maobi_show_mistakes` and the strokes they need to be written at least
+SHOW_MISTAKES = 50
+MIN_STROKES = 10
+
+SCHEMA = """
+create table if not exists strokes (
+    time integer not null,
+    character text not null,
+    stroke integer not null,
+    mistakes integer not null,
+    hint integer not null,
+    accepted integer not null
+);
+
+create table if not exists stroke_stats (
+    character text not null,
+    stroke integer not null,
+    count integer not null,
+    mistakes integer not null,
+    mistaken integer not null,
+    hints integer not null,
+    primary key (character, stroke)
+) without rowid;
+"""
+
+# The stats are updated with every flush, so that queries do not need to scan all strokes
+UPDATE_STATS = """
+insert into stroke_stats (character, stroke, count, mistakes, mistaken, hints)
+values (?, ?, 1, ?, ?, ?)
+on conflict (character, stroke) do update set
+    count = count + 1,
+    mistakes = mistakes + excluded.mistakes,
+    mistaken = mistaken + excluded.mistaken,
+    hints = hints + excluded.hints
+"""
+
+
+class StrokeLog:
+    """StrokeLog records every stroke written in the quiz together with the number of mistakes
+    before it was accepted, and the mistakes on strokes that were revealed or left unfinished.
+    Strokes are buffered and written to SQLite by a background thread in batches, so that
+    recording never waits for the disk."""
+
+    def __init__(self, path: str = PATH_STROKE_LOG):
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._wake = threading.Event()
+        self._closed = False
+
+        # Shared by the writer thread and queries, guarded by `_db_lock`
+        self._db_lock = threading.Lock()
+        self._db = None
+
+        self._thread = threading.Thread(
+            target=self._run, name="maobi-stroke-log", daemon=True
+        )
+        self._thread.start()
+
+    def add(
+        self,
+        character: str,
+        stroke: int,
+        mistakes: int,
+        hint: bool,
+        accepted: bool = True,
+    ):
+        """Buffers a stroke of `character` (index `stroke`) which was accepted after `mistakes`
+        wrong attempts, or given up after them if not `accepted`. `hint` tells whether the
+        stroke was hinted."""
+        entry = (
+            int(time.time() * 1000),
+            character,
+            stroke,
+            mistakes,
+            int(hint),
+            int(accepted),
+        )
+        with self._lock:
+            self._buffer.append(entry)
+            if len(self._buffer) >= FLUSH_SIZE:
+                self._wake.set()
+
+    def flush(self):
+        """Writes the buffered strokes."""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+
+        if not entries:
+            return
+
+        with self._db_lock:
+            db = self._connect()
+            with db:
+                db.executemany("insert into strokes values (?, ?, ?, ?, ?, ?)", entries)
+                db.executemany(
+                    UPDATE_STATS,
+                    [
+                        (character, stroke, mistakes, int(mistakes > 0), hint)
+                        for _, character, stroke, mistakes, hint, _ in entries
+                    ],
+                )
+
+    def error_rates(self, characters: list = None, min_count: int = 1) -> dict:
+        """Returns the error rates per character, computed from the aggregated stroke stats.
+
+        Returns:
+            dict[str, dict]: For each character with at least `min_count` written strokes (of
+            `characters` if given): the number of strokes, mistakes, strokes with mistakes,
+            hinted strokes and the share of strokes with mistakes (`error_rate`).
+
+        """
+        self.flush()
+
+        query = (
+            "select character, sum(count), sum(mistakes), sum(mistaken), sum(hints) "
+            "from stroke_stats"
+        )
+        args = []
+        if characters is not None:
+            query += f" where character in ({', '.join('?' * len(characters))})"
+            args = list(characters)
+        query += " group by character having sum(count) >= ?"
+        args.append(min_count)
+
+        with self._db_lock:
+            rows = self._connect().execute(query, args).fetchall()
+
+        return {
+            character: {
+                "strokes": count,
+                "mistakes": mistakes,
+                "mistaken": mistaken,
+                "hints": hints,
+                "error_rate": mistaken / count,
+            }
+            for character, count, mistakes, mistaken, hints in rows
+        }
+
+    def stroke_error_rates(self, character: str) -> list:
+        """Returns for each stroke of `character` the share of attempts with mistakes, or `None`
+        for strokes that were never written."""
+        self.flush()
+
+        with self._db_lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "select stroke, count, mistaken from stroke_stats where character = ?",
+                    (character,),
+                )
+                .fetchall()
+            )
+
+        if not rows:
+            return []
+
+        rates = [None] * (max(stroke for stroke, _, _ in rows) + 1)
+        for stroke, count, mistaken in rows:
+            rates[stroke] = mistaken / count
+        return rates
+
+    def close(self):
+        """Writes the buffered strokes and stops the writer thread."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            self.flush()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("pragma journal_mode = wal")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+
+_stroke_log = None
+_stroke_log_lock = threading.Lock()
+
+
+def get_stroke_log() -> StrokeLog:
+    """Returns the process-wide stroke log."""
+    global _stroke_log
+
+    with _stroke_log_lock:
+        if _stroke_log is None:
+            _stroke_log = StrokeLog()
+        return _stroke_log
+
+
+def close_stroke_log(*args):
+    """Writes the buffered strokes and closes the stroke log, e.g. when the profile is closed.
+    Accepts and ignores hook arguments."""
+    global _stroke_log
+
+    with _stroke_log_lock:
+        if _stroke_log is not None:
+            _stroke_log.close()
+            _stroke_log = None
+
+
+def maobi_show_mistakes():
+    """Shows the characters whose strokes were most often written wrong."""
+    from aqt.utils import showText
+
+    rates = get_stroke_log().error_rates(min_count=MIN_STROKES)
+    worst = sorted(rates.items(), key=lambda e: e[1]["error_rate"], reverse=True)
+
+    lines = [
+        f"{'character':<10} {'strokes':>8} {'mistakes':>9} {'hints':>6} {'error rate':>11}"
+    ]
+    for character, e in worst[:SHOW_MISTAKES]:
+        lines.append(
+            f"{character:<10} {e['strokes']:>8} {e['mistakes']:>9} {e['hints']:>6} "
+            f"{e['error_rate']:>11.0%}"
+        )
+
+    if len(lines) == 1:
+        lines.append("No strokes recorded yet.")
+
+    showText("\n".join(lines), title="Maobi mistakes")
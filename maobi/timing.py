@@ -0,0 +1,162 @@
+import heapq
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+PATH_MAOBI = os.path.dirname(os.path.realpath(__file__))
+PATH_TIMINGS = os.path.join(PATH_MAOBI, "user_files", "timings.json")
+
+# Number of most recent durations kept per phase
+WINDOW = 1000
+
+# Number of slowest durations kept per phase together with their label, e.g. the card
+SLOWEST = 5
+
+# Upper bounds of the histogram buckets in milliseconds
+BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+
+class Timings:
+    """Timings keeps the most recent durations (in ms) of named phases, e.g. `review.config`.
+    For durations recorded with a label, the slowest ones are kept with their label."""
+
+    def __init__(self, window: int = WINDOW):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._slowest = defaultdict(list)
+
+    def record(self, name: str, duration_ms: float, label: str = None):
+        with self._lock:
+            self._samples[name].append(duration_ms)
+
+            if label is not None:
+                slowest = self._slowest[name]
+                if len(slowest) < SLOWEST:
+                    heapq.heappush(slowest, (duration_ms, label))
+                elif duration_ms > slowest[0][0]:
+                    heapq.heapreplace(slowest, (duration_ms, label))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._slowest.clear()
+
+    def summary(self) -> dict:
+        """Returns count, mean, percentiles, max, a histogram and the slowest labeled durations
+        per phase."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            slowest = {
+                name: sorted(values, reverse=True)
+                for name, values in self._slowest.items()
+            }
+
+        result = {}
+        for name, values in sorted(samples.items()):
+            if not values:
+                continue
+
+            histogram = {}
+            for bound in BUCKETS + [float("inf")]:
+                count = sum(1 for v in values if v <= bound) - sum(histogram.values())
+                histogram[f"<={bound}"] = count
+
+            result[name] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": _percentile(values, 50),
+                "p90": _percentile(values, 90),
+                "p99": _percentile(values, 99),
+                "max": values[-1],
+                "histogram": histogram,
+                "slowest": [[d, label] for d, label in slowest.get(name, [])],
+            }
+
+        return result
+
+    def dump(self, path: str = PATH_TIMINGS) -> str:
+        """Writes the summary as JSON to `path` and returns the path."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def __str__(self) -> str:
+        lines = [
+            f"{'phase':<32} {'count':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  [ms]"
+        ]
+        summary = self.summary()
+        for name, e in summary.items():
+            lines.append(
+                f"{name:<32} {e['count']:>6} {e['p50']:>8.2f} {e['p90']:>8.2f} "
+                f"{e['p99']:>8.2f} {e['max']:>8.2f}"
+            )
+
+        for name, e in summary.items():
+            if e["slowest"]:
+                lines.append("")
+                lines.append(f"Slowest {name}:")
+                for duration_ms, label in e["slowest"]:
+                    lines.append(f"  {duration_ms:>8.2f} ms  {label}")
+
+        return "\n".join(lines)
+
+
+class PhaseTimer:
+    """PhaseTimer measures consecutive phases: every call to `phase` records the time since the
+    previous call (or since the timer was started) under `{prefix}.{name}`."""
+
+    def __init__(self, timings: Timings, prefix: str, start: float = None):
+        self._timings = timings
+        self._prefix = prefix
+        self._start = self._last = start if start is not None else time.perf_counter()
+
+    def phase(self, name: str):
+        now = time.perf_counter()
+        self._timings.record(f"{self._prefix}.{name}", (now - self._last) * 1000)
+        self._last = now
+
+    def done(self):
+        """Records the total time since the timer was started."""
+        now = time.perf_counter()
+        self._timings.record(f"{self._prefix}.total", (now - self._start) * 1000)
+
+
+class _NullTimer:
+    """Used when timing is disabled, so that measuring costs nothing but a method call."""
+
+    def phase(self, name: str):
+        pass
+
+    def done(self):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+timings = Timings()
+
+
+def start_timer(enabled: bool, prefix: str, start: float = None):
+    """Returns a PhaseTimer recording into `timings` if `enabled`, else a timer that does
+    nothing. `start` is the `time.perf_counter()` value at which the first phase started."""
+    if enabled:
+        return PhaseTimer(timings, prefix, start)
+    return _NULL_TIMER
+
+
+def maobi_show_timings():
+    """Shows the collected timings and writes them to user_files/timings.json."""
+    from aqt.utils import showText
+
+    path = timings.dump()
+    text = str(timings)
+    text += "\n\nTimings are only collected in debug mode."
+    text += f"\nWritten to {path}"
+    showText(text, title="Maobi timings")
+
+
+def _percentile(values: list, p: float) -> float:
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
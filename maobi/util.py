@@ -1,4 +1,5 @@
 import sys
+from collections import OrderedDict
 
 
 def error(msg: str):
@@ -12,3 +13,74 @@ def debug(config, msg: str):
     if config.debug:
         sys.stderr.write(msg)
         sys.stderr.write("\n")
+
+
+class LRUCache:
+    """LRUCache is a least recently used cache, bounded by the total size of its values. The
+    size of a value is given by `sizeof`, by default every value has size 1. Not thread-safe."""
+
+    def __init__(self, max_size: int, sizeof=None):
+        self.max_size = max_size
+        self._sizeof = sizeof or (lambda value: 1)
+        self._entries = OrderedDict()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self._entries:
+            self._size -= self._sizeof(self._entries.pop(key))
+
+        self._entries[key] = value
+        self._size += self._sizeof(value)
+
+        # Always keep the most recent entry, even if it alone exceeds the limit
+        while self._size > self.max_size and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= self._sizeof(evicted)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        value = self._entries.pop(key, _MISSING)
+        if value is _MISSING:
+            return default
+
+        self._size -= self._sizeof(value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_MISSING = object()
@@ -0,0 +1,96 @@
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+# A variant index maps characters without stroke data to a graphically equivalent character
+# with stroke data:
+#
+#   header  MAGIC, number of entries (uint32)
+#   keys    code points of the variants, sorted (uint32)
+#   values  code points of the characters to use instead, in the order of the keys (uint32)
+#
+# All integers are little endian. It is built by `scripts/build_variant_index.py`.
+
+PATH_MAOBI = os.path.dirname(os.path.realpath(__file__))
+PATH_VARIANTS = os.path.join(PATH_MAOBI, "variants.bin")
+
+MAGIC = b"MAOBIVR1"
+HEADER = struct.Struct("<8sI")
+
+
+class VariantIndex:
+    """VariantIndex looks up the substitute of a character by binary search over two arrays of
+    code points, which take 8 bytes per entry."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a variant index!")
+
+            self._keys = array("I")
+            self._keys.fromfile(f, count)
+            self._values = array("I")
+            self._values.fromfile(f, count)
+
+        if sys.byteorder != "little":
+            self._keys.byteswap()
+            self._values.byteswap()
+
+    def get(self, character: str) -> Optional[str]:
+        """Returns the substitute for `character` or `None` if there is none."""
+        code_point = ord(character)
+        i = bisect_left(self._keys, code_point)
+        if i < len(self._keys) and self._keys[i] == code_point:
+            return chr(self._values[i])
+        return None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def write_variant_index(path: str, variants: Iterable) -> int:
+    """Writes the (variant, substitute) pairs `variants` as variant index to `path`.
+
+    Returns:
+        The number of entries written.
+
+    """
+    entries = sorted((ord(v), ord(s)) for v, s in variants)
+
+    keys = array("I", (k for k, _ in entries))
+    values = array("I", (v for _, v in entries))
+    if sys.byteorder != "little":
+        keys.byteswap()
+        values.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        keys.tofile(f)
+        values.tofile(f)
+
+    return len(entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def find_variant(character: str) -> Optional[str]:
+    """Returns a graphically equivalent character with stroke data for `character`, or `None`.
+    The index is loaded on first use."""
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if os.path.exists(PATH_VARIANTS):
+                    _index = VariantIndex(PATH_VARIANTS)
+                else:
+                    _index = {}
+
+    return _index.get(character)
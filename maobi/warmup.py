@@ -0,0 +1,66 @@
+import time
+
+from .config import MaobiConfig
+from .notes import config_deck_ids, find_notes, read_fields, run_in_background
+from .quiz import MaobiException, compile_templates, extract_characters, read_assets
+from .store import get_character_store
+from .timing import start_timer
+from .util import debug
+from .variants import find_variant
+
+# Due notes per config whose characters are read ahead
+WARM_UP_NOTES = 200
+
+# Characters read ahead in total, well below what the character cache holds
+WARM_UP_CHARACTERS = 500
+
+
+def maobi_warm_up():
+    """Does the work of the first card in the background after the profile was opened: opens the
+    character store, reads the JavaScript assets and the character data of the due cards of the
+    configured decks. The templates are then compiled on the main thread."""
+    start = time.perf_counter()
+    maobi_config = MaobiConfig.load()
+
+    def on_done(count: int):
+        compile_templates(maobi_config)
+        debug(maobi_config, f"Warmed up {count} characters")
+
+    run_in_background(
+        lambda col: _warm_up(col, maobi_config, start),
+        on_done,
+        failure=lambda e: debug(maobi_config, f"Warming up failed: {e}"),
+    )
+
+
+def _warm_up(col, maobi_config: MaobiConfig, start: float) -> int:
+    timer = start_timer(maobi_config.debug, "warm_up", start)
+
+    store = get_character_store()
+    store.open()
+    timer.phase("store")
+
+    read_assets()
+    timer.phase("assets")
+
+    characters = {}
+    for config, deck_ids in config_deck_ids(col, maobi_config).items():
+        note_ids = find_notes(col, config, deck_ids, "is:due")[:WARM_UP_NOTES]
+        for _, characters_html in read_fields(col, config.field, note_ids, set()):
+            try:
+                found, _ = extract_characters(characters_html, config.field)
+            except MaobiException:
+                continue
+
+            for c in found:
+                if config.variant_fallback and c not in store:
+                    c = find_variant(c) or c
+                characters[c] = None
+    timer.phase("notes")
+
+    # Not counted in the cache stats, see `CharacterStore.prefetch`
+    count = store.prefetch(list(characters)[:WARM_UP_CHARACTERS])
+    timer.phase("characters")
+    timer.done()
+
+    return count
@@ -0,0 +1,150 @@
+""" Minimal stand-ins for the `anki` and `aqt` modules, so that the add-on can be imported and
+driven without a running Anki, e.g. for benchmarks. Call `install()` before importing `maobi`.
+"""
+
+import html
+import re
+import sys
+import types
+
+ADDON_PACKAGE = "maobi"
+
+
+class Hook(list):
+    """Stands in for all `gui_hooks`, hooks are only collected."""
+
+
+class GuiHooks(types.ModuleType):
+    def __getattr__(self, name: str) -> Hook:
+        hook = Hook()
+        setattr(self, name, hook)
+        return hook
+
+
+class AddonManager:
+    def __init__(self, config: dict):
+        self.config = config
+        self.web_exports = None
+
+    def getConfig(self, module: str) -> dict:
+        return self.config
+
+    def writeConfig(self, module: str, config: dict):
+        self.config = config
+
+    def setConfigUpdatedAction(self, module: str, action):
+        pass
+
+    def setWebExports(self, module: str, pattern: str):
+        self.web_exports = pattern
+
+    def addonFromModule(self, module: str) -> str:
+        return module.split(".")[0]
+
+
+class Decks:
+    def __init__(self, name: str):
+        self.name = name
+
+    def current(self) -> dict:
+        return {"name": self.name}
+
+
+class Collection:
+    def __init__(self, deck_name: str):
+        self.decks = Decks(deck_name)
+
+
+class Menu(list):
+    def addAction(self, action):
+        self.append(action)
+
+
+class MainWindow:
+    def __init__(self, deck_name: str, config: dict):
+        self.col = Collection(deck_name)
+        self.addonManager = AddonManager(config)
+        self.form = types.SimpleNamespace(menuTools=Menu())
+        self.pm = types.SimpleNamespace(name="User 1")
+
+
+class Note(dict):
+    def __init__(self, note_type: str, fields: dict, id: int = 1, mod: int = 0):
+        super().__init__(fields)
+        self.note_type = note_type
+        self.id = id
+        self.mod = mod
+
+    def model(self) -> dict:
+        return {"name": self.note_type}
+
+
+class QAction:
+    def __init__(self, text: str, parent=None):
+        self.text = text
+        self.triggered = Hook()
+
+
+class Card:
+    def __init__(self, note: Note, template_name: str):
+        self._note = note
+        self._template_name = template_name
+
+    def note(self) -> Note:
+        return self._note
+
+    def template(self) -> dict:
+        return {"name": self._template_name}
+
+
+_RE_COMMENT = re.compile("(?s)<!--.*?-->")
+_RE_STYLE = re.compile("(?si)<style.*?>.*?</style>")
+_RE_SCRIPT = re.compile("(?si)<script.*?>.*?</script>")
+_RE_TAG = re.compile("(?s)<.*?>")
+
+
+def strip_html(txt: str) -> str:
+    """Same as `anki.utils.stripHTML`."""
+    txt = _RE_COMMENT.sub("", txt)
+    txt = _RE_STYLE.sub("", txt)
+    txt = _RE_SCRIPT.sub("", txt)
+    txt = _RE_TAG.sub("", txt)
+    txt = html.unescape(txt.replace("&nbsp;", " "))
+    return txt.strip()
+
+
+def install(deck_name: str, config: dict) -> MainWindow:
+    """Registers the stub modules in `sys.modules` and returns the stubbed `aqt.mw`."""
+    mw = MainWindow(deck_name, config)
+
+    modules = {
+        "anki": types.ModuleType("anki"),
+        "anki.buildinfo": types.ModuleType("anki.buildinfo"),
+        "anki.cards": types.ModuleType("anki.cards"),
+        "anki.hooks": types.ModuleType("anki.hooks"),
+        "anki.utils": types.ModuleType("anki.utils"),
+        "aqt": types.ModuleType("aqt"),
+        "aqt.clayout": types.ModuleType("aqt.clayout"),
+        "aqt.gui_hooks": GuiHooks("aqt.gui_hooks"),
+        "aqt.operations": types.ModuleType("aqt.operations"),
+        "aqt.qt": types.ModuleType("aqt.qt"),
+        "aqt.utils": types.ModuleType("aqt.utils"),
+    }
+
+    modules["anki.buildinfo"].version = "24.06.3"
+    modules["anki.cards"].Card = Card
+    modules["anki.hooks"].wrap = lambda old, new, pos="after": new
+    modules["anki.utils"].stripHTML = strip_html
+    modules["anki.utils"].ids2str = lambda ids: "(%s)" % ",".join(str(i) for i in ids)
+    modules["aqt"].mw = mw
+    modules["aqt"].gui_hooks = modules["aqt.gui_hooks"]
+    modules["aqt.clayout"].CardLayout = object
+    modules["aqt.operations"].QueryOp = object
+    modules["aqt.qt"].QAction = QAction
+    modules["aqt.qt"].qconnect = lambda signal, slot: signal.append(slot)
+    modules["aqt.utils"].showText = print
+    for name in ["QDialog", "QCheckBox", "QComboBox", "QSpinBox", "QSlider"]:
+        setattr(modules["aqt.qt"], name, object)
+
+    sys.modules.update(modules)
+    return mw
@@ -0,0 +1,107 @@
+""" Compares reading character data from `characters.zip` and from `characters.pack`: the time to
+open the file and look up the first character (cold start), the time per lookup afterwards and
+the memory allocated by opening the file.
+
+    python scripts/benchmark_character_store.py [--zip maobi/characters.zip] [--pack maobi/characters.pack]
+
+If the zip file does not exist, synthetic data with 9500 characters is generated, and packed if
+the pack does not exist either.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from zipfile import ZIP_DEFLATED, ZipFile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anki_stubs
+
+anki_stubs.install("Default", {})
+
+from maobi.pack import CharacterPack, write_character_pack  # noqa: E402
+from maobi.store import PATH_CHARACTER_PACK, PATH_CHARACTERS, CharacterZip  # noqa: E402
+
+LOOKUPS = 2000
+
+# About the number of characters in the bundled data
+SYNTHETIC_CHARACTERS = 9500
+
+
+def build_synthetic_characters(path: str) -> dict:
+    """Writes a characters.zip with random data of realistic size for `SYNTHETIC_CHARACTERS`
+    characters, starting at U+4E00. Returns the character data by character."""
+    r = random.Random(0)
+    characters = {}
+
+    with ZipFile(path, "w", ZIP_DEFLATED) as myzip:
+        for i in range(SYNTHETIC_CHARACTERS):
+            c = chr(0x4E00 + i)
+            strokes = r.randint(3, 15)
+            data = {
+                "strokes": [
+                    " ".join(f"Q {r.randint(0, 1024)} {r.randint(0, 1024)}" for _ in range(12))
+                    for _ in range(strokes)
+                ],
+                "medians": [
+                    [[r.randint(0, 1024), r.randint(0, 1024)] for _ in range(6)]
+                    for _ in range(strokes)
+                ],
+            }
+            characters[c] = json.dumps(data)
+            myzip.writestr(f"data/{c}.json", characters[c])
+
+    return characters
+
+
+def bench(name: str, open_source, characters: list):
+    tracemalloc.start()
+    start = time.perf_counter()
+    source = open_source()
+    source.get(characters[0])
+    cold = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for c in characters:
+        source.get(c)
+    warm = (time.perf_counter() - start) / len(characters)
+
+    source.close()
+
+    print(
+        f"{name:>5} {cold * 1e3:>15.2f} {warm * 1e6:>15.1f} {allocated / 1024:>15.0f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zip", default=PATH_CHARACTERS)
+    parser.add_argument("--pack", default=PATH_CHARACTER_PACK)
+    args = parser.parse_args()
+
+    data_source = "bundled"
+    if not os.path.exists(args.zip):
+        tmp = tempfile.mkdtemp()
+        args.zip = os.path.join(tmp, "characters.zip")
+        synthetic = build_synthetic_characters(args.zip)
+        if not os.path.exists(args.pack):
+            args.pack = os.path.join(tmp, "characters.pack")
+            write_character_pack(args.pack, synthetic.items())
+        data_source = "synthetic"
+
+    source = CharacterZip(args.zip)
+    characters = random.Random(0).choices(list(source._index), k=LOOKUPS)
+    source.close()
+
+    print(f"Character data: {data_source}")
+    print(f"{'':>5} {'cold start [ms]':>15} {'lookup [us]':>15} {'allocated [KB]':>15}")
+    bench("zip", lambda: CharacterZip(args.zip), characters)
+    bench("pack", lambda: CharacterPack(args.pack), characters)
@@ -0,0 +1,88 @@
+""" Compares the character extraction of `maobi/extract.py` with the previous implementation
+(stripHTML, a regular expression per tone and removing characters from a list one by one) on
+long fields.
+
+    python scripts/benchmark_extract_characters.py
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Import the extract module directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi")
+)
+
+from anki_stubs import strip_html
+from extract import tokenize_characters
+
+RUNS = 200
+
+SENTENCE = "我们明天早上八点在学校门口见面，不见不散！"
+
+
+def extract_previous(characters_html: str) -> tuple:
+    """The implementation before `tokenize_characters`."""
+    characters = strip_html(characters_html)
+
+    tones = []
+    if "span" in characters_html:
+        tones = list(re.findall("tone[12345]", characters_html))
+    if len(tones) != len(characters):
+        tones = []
+
+    non_chinese_chars = re.finditer(r"[^一-鿐]", characters)
+    characters_list = list(characters)
+    for char_match in reversed(list(non_chinese_chars)):
+        del_idx = char_match.start()
+        del characters_list[del_idx]
+        if len(tones) > 0:
+            del tones[del_idx]
+
+    return characters_list, tones
+
+
+def plain_field(length: int) -> str:
+    return (SENTENCE * (length // len(SENTENCE) + 1))[:length]
+
+
+def colored_field(length: int) -> str:
+    return "".join(
+        f'<span class="tone{i % 5 + 1}">{c}</span>'
+        for i, c in enumerate(plain_field(length))
+    )
+
+
+def nested_field(length: int) -> str:
+    """Colored, but with markup inside the toned elements, which needs the tokenizer."""
+    return "".join(
+        f'<span class="tone{i % 5 + 1}"><b>{c}</b></span>'
+        for i, c in enumerate(plain_field(length))
+    )
+
+
+def markup_field(length: int) -> str:
+    """Not colored, but with entities, which needs the tokenizer."""
+    return "&nbsp;".join(f"<b>{c}</b>" for c in plain_field(length))
+
+
+if __name__ == "__main__":
+    print(f"{'field':>8} {'length':>7} {'previous [us]':>14} {'single pass [us]':>17}")
+    for name, build in [
+        ("plain", plain_field),
+        ("colored", colored_field),
+        ("nested", nested_field),
+        ("markup", markup_field),
+    ]:
+        for length in [4, 50, 200, 1000]:
+            field = build(length)
+            results = []
+            for fn in [extract_previous, tokenize_characters]:
+                seconds = min(timeit.repeat(lambda: fn(field), number=RUNS, repeat=5))
+                results.append(seconds / RUNS * 1e6)
+
+            print(f"{name:>8} {length:>7} {results[0]:>14.1f} {results[1]:>17.1f}")
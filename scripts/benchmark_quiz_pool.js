@@ -0,0 +1,223 @@
+/**
+ * Measures the DOM size and the restart latency of the quiz in `maobi/quiz.js` with the real Hanzi Writer on a
+ * minimal fake DOM, so neither Anki nor a browser is needed. Timers and animation frames run on a fake clock, the
+ * latency is the JavaScript time of a restart without its animation delays. Layout and painting are not included.
+ *
+ *     node scripts/benchmark_quiz_pool.js [path/to/quiz.js]
+ *
+ * To compare with another version of the quiz, e.g. before a commit:
+ *
+ *     git show <commit>:maobi/quiz.js > /tmp/quiz.js
+ *     node scripts/benchmark_quiz_pool.js /tmp/quiz.js
+ */
+
+var fs = require('fs');
+var path = require('path');
+
+var PATH_MAOBI = path.join(__dirname, '..', 'maobi');
+
+var CHARACTERS = '我们明天早上八点在学校门口见面然后一起去图书馆看书';
+var STROKES = 12;
+var RESTARTS = 20;
+
+// Fake DOM, only what quiz.js and Hanzi Writer use
+
+var nodesCreated = 0;
+var elementsById = {};
+
+function Node(name) {
+    nodesCreated++;
+    this.nodeName = name;
+    this.childNodes = [];
+    this.parentNode = null;
+    this.style = {};
+    this.attributes = {};
+    this.listeners = {};
+    this.classList = {contains: function () { return false; }};
+}
+
+Node.prototype.appendChild = function (child) {
+    if (child.parentNode) child.parentNode.removeChild(child);
+    child.parentNode = this;
+    this.childNodes.push(child);
+    return child;
+};
+Node.prototype.append = Node.prototype.appendChild;
+Node.prototype.removeChild = function (child) {
+    this.childNodes.splice(this.childNodes.indexOf(child), 1);
+    child.parentNode = null;
+    return child;
+};
+Node.prototype.setAttribute = function (name, value) {
+    this.attributes[name] = String(value);
+};
+Node.prototype.setAttributeNS = function (ns, name, value) {
+    this.attributes[name] = String(value);
+};
+Node.prototype.getAttribute = function (name) {
+    return this.attributes[name] === undefined ? null : this.attributes[name];
+};
+Node.prototype.addEventListener = function (type, listener) {
+    (this.listeners[type] = this.listeners[type] || []).push(listener);
+};
+Node.prototype.click = function () {
+    (this.listeners.click || []).forEach(function (listener) { listener(); });
+};
+Node.prototype.getBoundingClientRect = function () {
+    return {left: 0, top: 0, width: 100, height: 100};
+};
+Object.defineProperty(Node.prototype, 'innerHTML', {
+    get: function () { return ''; },
+    set: function () {
+        this.childNodes.forEach(function (child) { child.parentNode = null; });
+        this.childNodes = [];
+    },
+});
+
+function countNodes(node) {
+    return node.childNodes.reduce(function (count, child) { return count + countNodes(child); }, 1);
+}
+
+function element(id) {
+    var node = new Node('DIV');
+    elementsById[id] = node;
+    document.body.appendChild(node);
+    return node;
+}
+
+// Fake clock, timers and animation frames run in order of their due time when `runTimers` is called
+
+var now = 0;
+var timers = [];
+
+function addTimer(callback, delay, args) {
+    timers.push({due: now + (delay || 0), callback: callback, args: args});
+    timers.sort(function (a, b) { return a.due - b.due; });
+    return timers[timers.length - 1];
+}
+
+function runTimers() {
+    return new Promise(function (resolve) {
+        (function next() {
+            if (timers.length === 0) {
+                resolve();
+                return;
+            }
+            var timer = timers.shift();
+            now = Math.max(now, timer.due);
+            timer.callback.apply(null, timer.args);
+            // let the promises of Hanzi Writer settle before the next timer
+            setImmediate(next);
+        })();
+    });
+}
+
+global.window = global.self = global;
+global.location = {href: ''};
+global.document = {
+    body: null,
+    head: null,
+    createElement: function (name) { return new Node(name.toUpperCase()); },
+    createElementNS: function (ns, name) { return new Node(name.toUpperCase()); },
+    getElementById: function (id) { return elementsById[id] || null; },
+    addEventListener: function () {},
+};
+document.body = new Node('BODY');
+document.head = new Node('HEAD');
+Object.defineProperty(global, 'performance', {value: {now: function () { return now; }}});
+global.setTimeout = function (callback, delay) { return addTimer(callback, delay, []); };
+global.clearTimeout = function (timer) {
+    var i = timers.indexOf(timer);
+    if (i >= 0) timers.splice(i, 1);
+};
+global.requestAnimationFrame = function (callback) { return addTimer(function () { callback(now); }, 16, []); };
+global.cancelAnimationFrame = global.clearTimeout;
+global.getComputedStyle = function () { return {color: 'rgb(0, 0, 0)'}; };
+global.pycmd = function () {};
+
+// Hanzi Writer and the quiz, the quiz options of the current writer are kept to complete its quiz. Older versions of
+// the quiz passed them when creating the writer.
+
+global.HanziWriter = require(path.join(PATH_MAOBI, 'hanzi-writer.min.js'));
+var writersCreated = 0;
+var create = HanziWriter.create;
+HanziWriter.create = function () {
+    writersCreated++;
+    var writer = create.apply(HanziWriter, arguments);
+    writer.maobiOptions = arguments[2];
+    return writer;
+};
+var quizOptions;
+var quiz = HanziWriter.prototype.quiz;
+HanziWriter.prototype.quiz = function (options) {
+    quizOptions = options || this.maobiOptions;
+    return quiz.apply(this, arguments);
+};
+
+eval(fs.readFileSync(process.argv[2] || path.join(PATH_MAOBI, 'quiz.js'), 'utf8'));
+
+function characterData() {
+    var strokes = [];
+    var medians = [];
+    for (var i = 0; i < STROKES; i++) {
+        strokes.push('M ' + (100 + i * 50) + ' 200 Q 300 400 500 600 L 520 620 Z');
+        medians.push([[100 + i * 50, 200], [300, 400], [500, 600]]);
+    }
+    return {strokes: strokes, medians: medians};
+}
+
+async function completeAll() {
+    for (var i = 0; i < CHARACTERS.length; i++) {
+        await runTimers();
+        quizOptions.onComplete({character: CHARACTERS[i], totalMistakes: 0});
+    }
+    await runTimers();
+}
+
+async function main() {
+    var target = element('character-target-div');
+    var restartButton = element('restart-button');
+    element('reveal-button');
+
+    var characters = CHARACTERS.split('');
+    var charactersData = {};
+    characters.forEach(function (c) { charactersData[c] = characterData(); });
+
+    maobiQuiz(
+        {targetDiv: 'character-target-div', revealButton: 'reveal-button', restartButton: 'restart-button', size: 150,
+            leniency: 1, showHintAfterMisses: 3, debug: false, logStrokes: false},
+        {characters: characters, tones: [], charactersData: charactersData, bundle: null}
+    );
+    await completeAll();
+
+    console.log('Characters:                     ' + characters.length);
+    console.log('Writers after the first pass:   ' + writersCreated);
+    console.log('DOM nodes after the first pass: ' + countNodes(target));
+
+    var restarts = [];
+    var passes = [];
+    var createdBefore = nodesCreated;
+    var writersBefore = writersCreated;
+    for (var i = 0; i < RESTARTS; i++) {
+        var start = process.hrtime.bigint();
+        restartButton.childNodes[0].click();
+        await runTimers();
+        restarts.push(Number(process.hrtime.bigint() - start) / 1e6);
+
+        await completeAll();
+        passes.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+
+    console.log('DOM nodes after ' + RESTARTS + ' restarts:    ' + countNodes(target));
+    console.log('Writers created per pass:       ' + (writersCreated - writersBefore) / RESTARTS);
+    console.log('DOM nodes created per pass:     ' + Math.round((nodesCreated - createdBefore) / RESTARTS));
+    console.log('Restart latency (ms):           ' + summary(restarts));
+    console.log('Restart and full pass (ms):     ' + summary(passes));
+}
+
+function summary(times) {
+    times.sort(function (a, b) { return a - b; });
+    return 'median ' + times[times.length >> 1].toFixed(2) + ', max ' + times[times.length - 1].toFixed(2);
+}
+
+main();
@@ -0,0 +1,92 @@
+""" Measures the per-card cost of rendering the quiz template, once the way `maobi_review_hook`
+did it before templates were precompiled and once with the precompiled template. Character data is synthetic, so `characters.zip` is not needed.
+
+    python scripts/benchmark_render.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anki_stubs
+
+DECK = "Maobi"
+TEMPLATE = "Recognition"
+CONFIG = {"decks": [{"deck": DECK, "template": TEMPLATE, "field": "Hanzi"}]}
+
+RUNS = 2000
+
+anki_stubs.install(DECK, CONFIG)
+
+from maobi import grid, quiz  # noqa: E402
+from maobi.config import MaobiConfig  # noqa: E402
+
+
+def build_data(characters: str) -> dict:
+    character_data = json.dumps(
+        {"strokes": ["M 100 200 Q 300 400 500 600 Z"] * 12, "medians": [[[1, 2]] * 4]}
+    )
+    return {
+        "html": '<div id="character-target-div"></div>',
+        "bundle": "null",
+        "characters": json.dumps(list(characters)),
+        "tones": "[]",
+        "characters_data": "{"
+        + ", ".join(f"{json.dumps(c)}: {character_data}" for c in set(characters))
+        + "}",
+    }
+
+
+def bench_before(maobi_config: MaobiConfig, config, data: dict, inline_scripts: bool):
+    """Before, the grid was built, the script tags were joined and the whole template was
+    substituted for every card. The assets and their hashes were already cached."""
+    grid.grid_data_uri.cache_clear()
+    if inline_scripts:
+        scripts = quiz._build_inline_scripts()
+    else:
+        scripts = quiz._build_web_export_scripts()
+
+    return quiz.TEMPLATE.substitute(
+        data,
+        scripts=scripts,
+        target_div=quiz.TARGET_DIV,
+        reveal_button=quiz.REVEAL_BUTTON,
+        restart_button=quiz.RESTART_BUTTON,
+        size=config.size,
+        leniency=config.leniency / 100.0,
+        show_hint_after_misses=config.show_hint_after_misses,
+        debug=json.dumps(maobi_config.debug),
+        log_strokes=json.dumps(maobi_config.log_strokes),
+        styles=quiz._build_hanzi_grid_style(config.grid, maobi_config.grid_style),
+    )
+
+
+def bench_after(maobi_config: MaobiConfig, config, data: dict, inline_scripts: bool):
+    template = quiz._compile_template(maobi_config, config, inline_scripts, True)
+    return quiz._render_template(template, data)
+
+
+if __name__ == "__main__":
+    maobi_config = MaobiConfig.load()
+    config = maobi_config.search_active_deck_config(DECK, TEMPLATE)
+
+    print(f"{'characters':>10} {'scripts':>8} {'before [us]':>12} {'after [us]':>12}")
+    for characters in ["好", "你好朋友", "我" * 100]:
+        data = build_data(characters)
+
+        for inline_scripts in [True, False]:
+            results = []
+            for fn in [bench_before, bench_after]:
+                seconds = timeit.timeit(
+                    lambda: fn(maobi_config, config, data, inline_scripts), number=RUNS
+                )
+                results.append(seconds / RUNS * 1e6)
+
+            mode = "inline" if inline_scripts else "export"
+            print(
+                f"{len(characters):>10} {mode:>8} {results[0]:>12.1f} {results[1]:>12.1f}"
+            )
@@ -0,0 +1,198 @@
+""" Benchmarks `maobi_review_hook` without Anki. `anki` and `aqt` are replaced by the stubs in
+`anki_stubs.py`, the hook is driven over cards with a single character, a 4 character word and
+a 100 character sentence, each with a cold (closed character store, empty caches) and a warm
+character store. Reported are latency percentiles, the size of the emitted HTML and the memory
+allocated per call (peak, traced by tracemalloc).
+
+Results are written as JSON so that runs of different commits can be compared:
+
+    python scripts/benchmark_review_hook.py --output before.json
+    git checkout ...
+    python scripts/benchmark_review_hook.py --output after.json --compare before.json
+
+The character data is read from `maobi/characters.pack` or `maobi/characters.zip`. If neither
+exists, synthetic data is generated.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from zipfile import ZIP_DEFLATED, ZipFile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anki_stubs
+
+DECK = "Maobi"
+TEMPLATE = "Recognition"
+FIELD = "Hanzi"
+CONFIG = {"decks": [{"deck": DECK, "template": TEMPLATE, "field": FIELD}]}
+
+HTML = '<div id="character-target-div"></div>'
+SENTENCE = "我们明天早上八点在学校门口见面不见不散"
+
+WORKLOADS = {
+    "character": "好",
+    "word": "你好朋友",
+    "sentence": (SENTENCE * 6)[:100],
+}
+
+mw = anki_stubs.install(DECK, CONFIG)
+
+from maobi import quiz, store  # noqa: E402
+
+
+def build_synthetic_characters(path: str):
+    """Writes a characters.zip with random data of realistic size for the workload characters."""
+    r = random.Random(0)
+    characters = sorted(set("".join(WORKLOADS.values())))
+
+    with ZipFile(path, "w", ZIP_DEFLATED) as myzip:
+        for c in characters:
+            strokes = r.randint(3, 15)
+            data = {
+                "strokes": [
+                    " ".join(f"Q {r.randint(0, 1024)} {r.randint(0, 1024)}" for _ in range(12))
+                    for _ in range(strokes)
+                ],
+                "medians": [
+                    [[r.randint(0, 1024), r.randint(0, 1024)] for _ in range(6)]
+                    for _ in range(strokes)
+                ],
+            }
+            myzip.writestr(f"data/{c}.json", json.dumps(data))
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_workload(characters: str, cold: bool, runs: int) -> dict:
+    note = anki_stubs.Note("Maobi", {FIELD: characters})
+    card = anki_stubs.Card(note, TEMPLATE)
+
+    def call():
+        if cold:
+            store.close_character_store()
+            quiz._note_cache.clear()
+        return quiz.maobi_review_hook(HTML, card, "reviewQuestion")
+
+    # Warm up the template and, for warm runs, the caches
+    result = call()
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    allocations = []
+    tracemalloc.start()
+    for _ in range(min(runs, 100)):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations.append(peak - before)
+    tracemalloc.stop()
+
+    return {
+        "p50_us": percentile(latencies, 50),
+        "p90_us": percentile(latencies, 90),
+        "p99_us": percentile(latencies, 99),
+        "mean_us": statistics.mean(latencies),
+        "html_bytes": len(result.encode("utf-8")),
+        "peak_alloc_bytes": statistics.median(allocations),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict):
+    header = f"{'workload':>20} {'p50 [us]':>10} {'p90 [us]':>10} {'p99 [us]':>10}"
+    header += f" {'html [B]':>10} {'alloc [B]':>10}"
+    print(header)
+
+    for name, result in results.items():
+        line = f"{name:>20} {result['p50_us']:>10.1f} {result['p90_us']:>10.1f}"
+        line += f" {result['p99_us']:>10.1f} {result['html_bytes']:>10}"
+        line += f" {result['peak_alloc_bytes']:>10.0f}"
+        print(line)
+
+        if name in baseline:
+            old = baseline[name]
+            change = f"{'vs baseline':>20} {_change(old['p50_us'], result['p50_us']):>10}"
+            change += f" {_change(old['p90_us'], result['p90_us']):>10}"
+            change += f" {_change(old['p99_us'], result['p99_us']):>10}"
+            change += f" {_change(old['html_bytes'], result['html_bytes']):>10}"
+            change += f" {_change(old['peak_alloc_bytes'], result['peak_alloc_bytes']):>10}"
+            print(change)
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "-"
+    return f"{(new - old) / old:+.0%}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare with the results in this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(store.PATH_CHARACTER_PACK) and not os.path.exists(
+        store.PATH_CHARACTERS
+    ):
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, "characters.zip")
+        build_synthetic_characters(path)
+        store._store = store.CharacterStore(
+            pack_path=os.path.join(tmp, "characters.pack"), zip_path=path
+        )
+        data_source = "synthetic"
+    else:
+        data_source = "bundled"
+
+    results = {}
+    for name, characters in WORKLOADS.items():
+        for cold in [True, False]:
+            key = f"{name}/{'cold' if cold else 'warm'}"
+            results[key] = run_workload(characters, cold, args.runs)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "data": data_source,
+            "runs": args.runs,
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
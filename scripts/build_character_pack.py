@@ -0,0 +1,54 @@
+""" This script converts `maobi/characters.zip` into the character pack `maobi/characters.pack`,
+see `maobi/pack.py` for the format. If the pack exists, the add-on uses it instead of the zip.
+
+    python scripts/build_character_pack.py [--no-compress]
+"""
+
+import argparse
+import os
+import sys
+from zipfile import ZipFile
+
+# Import the pack module directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi")
+)
+
+from pack import write_character_pack
+
+PATH_CHARACTERS = os.path.join("maobi", "characters.zip")
+PATH_CHARACTER_PACK = os.path.join("maobi", "characters.pack")
+
+
+def read_characters_zip(path: str):
+    """Yields (character, character data) for every character in the zip file at `path`."""
+    with ZipFile(path, "r") as myzip:
+        for info in myzip.infolist():
+            name = info.filename
+            if not (name.startswith("data/") and name.endswith(".json")):
+                continue
+
+            character = name[len("data/") : -len(".json")]
+            with myzip.open(info) as f:
+                yield character, f.read().decode("utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=PATH_CHARACTERS)
+    parser.add_argument("--target", default=PATH_CHARACTER_PACK)
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="Store records uncompressed. Faster lookups, larger file.",
+    )
+    args = parser.parse_args()
+
+    count = write_character_pack(
+        args.target, read_characters_zip(args.source), compress=not args.no_compress
+    )
+
+    source_size = os.path.getsize(args.source)
+    target_size = os.path.getsize(args.target)
+    print(f"Wrote {count} characters to {args.target}")
+    print(f"{args.source}: {source_size} bytes, {args.target}: {target_size} bytes")
@@ -0,0 +1,105 @@
+""" This script builds the variant index `maobi/variants.bin`, see `maobi/variants.py` for the
+format. It maps characters that have no stroke data to a graphically equivalent character that
+has, so that cards with e.g. compatibility ideographs can still be quizzed.
+
+Graphically equivalent are:
+
+- the CJK compatibility ideographs and their canonical decomposition (Unicode NFC)
+- the z-variants (`kZVariant`) of the Unihan database, if `Unihan_Variants.txt` is given
+
+Traditional and simplified characters are not equivalent, as they are written differently.
+
+    python scripts/build_variant_index.py [--unihan Unihan_Variants.txt]
+"""
+
+import argparse
+import os
+import sys
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Import the modules directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi")
+)
+
+from build_character_pack import read_characters_zip
+from pack import CharacterPack
+from variants import write_variant_index
+
+PATH_CHARACTERS = os.path.join("maobi", "characters.zip")
+PATH_CHARACTER_PACK = os.path.join("maobi", "characters.pack")
+PATH_VARIANTS = os.path.join("maobi", "variants.bin")
+
+COMPATIBILITY_IDEOGRAPHS = [(0xF900, 0xFAFF), (0x2F800, 0x2FA1F)]
+
+
+def compatibility_variants():
+    """Yields (compatibility ideograph, unified ideograph) pairs."""
+    for start, end in COMPATIBILITY_IDEOGRAPHS:
+        for code_point in range(start, end + 1):
+            c = chr(code_point)
+            normalized = unicodedata.normalize("NFC", c)
+            if normalized != c and len(normalized) == 1:
+                yield c, normalized
+
+
+def z_variants(path: str):
+    """Yields (character, z-variant) pairs in both directions from `Unihan_Variants.txt`."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or "\tkZVariant\t" not in line:
+                continue
+
+            source, _, values = line.rstrip("\n").split("\t")
+            c = chr(int(source[2:], 16))
+
+            # e.g. "U+5140<kHanYu U+5141<kMeyerWempe"
+            for value in values.split():
+                variant = chr(int(value.split("<")[0][2:], 16))
+                yield c, variant
+                yield variant, c
+
+
+def build_variants(available: set, candidates) -> dict:
+    """Maps each character without data to the first of its candidates with data."""
+    variants = {}
+    for c, substitute in candidates:
+        if c not in available and c not in variants and substitute in available:
+            variants[c] = substitute
+    return variants
+
+
+def build_default_variant_index(target: str = PATH_VARIANTS):
+    """Builds the index with the compatibility variants only, from `characters.zip` or, if that
+    is missing, `characters.pack`."""
+    if os.path.exists(PATH_CHARACTERS):
+        available = {c for c, _ in read_characters_zip(PATH_CHARACTERS)}
+        variants = build_variants(available, compatibility_variants())
+    else:
+        pack = CharacterPack(PATH_CHARACTER_PACK)
+        variants = build_variants(pack, compatibility_variants())
+        pack.close()
+    count = write_variant_index(target, variants.items())
+
+    print(f"Wrote {count} variants to {target}, without z-variants")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=PATH_CHARACTERS)
+    parser.add_argument("--target", default=PATH_VARIANTS)
+    parser.add_argument("--unihan", help="Path to Unihan_Variants.txt")
+    args = parser.parse_args()
+
+    available = {c for c, _ in read_characters_zip(args.source)}
+
+    candidates = list(compatibility_variants())
+    if args.unihan:
+        candidates += sorted(z_variants(args.unihan))
+
+    variants = build_variants(available, candidates)
+    count = write_variant_index(args.target, variants.items())
+
+    print(f"Wrote {count} variants to {args.target} ({os.path.getsize(args.target)} bytes)")
@@ -0,0 +1,59 @@
+""" This script draws the grids of the add-on side by side into `img/grids.svg`, which is shown in
+the README. The grids are built by `maobi/grid.py`, so the image shows what the cards show.
+
+    python scripts/generate_grid_image.py
+"""
+
+import os
+import sys
+
+# Import the grid module directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi")
+)
+
+from grid import SIZE, GridStyle, build_grid_lines
+
+PATH_IMAGE = os.path.join("img", "grids.svg")
+
+# The names in the configuration and their characters
+GRIDS = [("Field", "田"), ("Rice", "米"), ("Hui", "回"), ("Nine", "九")]
+
+# The default style, see `MaobiConfig`
+STYLE = GridStyle("#dcdcdc", 0.5, 0.5)
+
+MARGIN = 1
+GAP = 20
+LABEL_HEIGHT = 26
+
+
+def build_image() -> str:
+    width = 2 * MARGIN + len(GRIDS) * SIZE + (len(GRIDS) - 1) * GAP
+    height = 2 * MARGIN + SIZE + LABEL_HEIGHT
+
+    elements = []
+    for i, (name, character) in enumerate(GRIDS):
+        x = MARGIN + i * (SIZE + GAP)
+        elements.append(
+            f'<g transform="translate({x},{MARGIN})">'
+            f"{build_grid_lines(name.lower(), STYLE)}"
+            f'<rect width="{SIZE}" height="{SIZE}" fill="none" stroke="#000000" '
+            f'stroke-width="{STYLE.border_width}" />'
+            f'<text x="{SIZE / 2:g}" y="{SIZE + LABEL_HEIGHT - 6}" text-anchor="middle">'
+            f"{name} {character}</text>"
+            "</g>"
+        )
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="serif" font-size="18">\n'
+        + "\n".join(elements)
+        + "\n</svg>\n"
+    )
+
+
+if __name__ == "__main__":
+    with open(PATH_IMAGE, "w", encoding="utf-8") as f:
+        f.write(build_image())
+
+    print(f"Wrote {len(GRIDS)} grids to {PATH_IMAGE}")
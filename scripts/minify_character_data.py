@@ -0,0 +1,268 @@
+""" This script minifies the Hanzi Writer character data in `maobi/characters.zip` before it is
+packaged. Coordinates in `strokes` and `medians` are rounded to `--precision` decimals (negative
+values round to tens, hundreds, ...), path strings and JSON lose all redundant whitespace and
+median polylines can be simplified within `--tolerance` (Ramer-Douglas-Peucker). Outline paths
+are only rounded, simplifying their curves would change how characters look.
+
+Afterwards, every character is verified: it needs the same number of strokes, and every
+minified median has to stay well within the grading thresholds of Hanzi Writer relative to its
+original, so that a stroke is graded the same with both.
+
+    python scripts/minify_character_data.py [--precision 0] [--tolerance 0] [--report sizes.csv]
+    python scripts/build_character_pack.py --source target/characters.min.zip
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+from zipfile import ZIP_DEFLATED, ZipFile
+
+PATH_CHARACTERS = os.path.join("maobi", "characters.zip")
+PATH_MINIFIED = os.path.join("target", "characters.min.zip")
+
+# Hanzi Writer grades strokes with these thresholds (`strokeMatches.ts`, leniency 1). A minified
+# median may only use `FIDELITY` of each, so that grading does not change noticeably.
+START_AND_END_DIST_THRESHOLD = 250
+AVG_DIST_THRESHOLD = 350
+FRECHET_THRESHOLD = 0.4
+FIDELITY = 0.05
+
+PATH_TOKEN = re.compile(r"[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def round_number(value: float, precision: int):
+    value = round(value, precision)
+    if precision <= 0 or value == int(value):
+        return int(value)
+    return value
+
+
+def minify_path(path: str, precision: int) -> str:
+    """Rounds all coordinates in the SVG path `path` and drops whitespace that is not needed."""
+    result = []
+    previous_is_number = False
+    for token in PATH_TOKEN.findall(path):
+        if token.isalpha():
+            result.append(token)
+            previous_is_number = False
+        else:
+            number = str(round_number(float(token), precision))
+            # A minus sign separates numbers on its own
+            if previous_is_number and not number.startswith("-"):
+                result.append(" ")
+            result.append(number)
+            previous_is_number = True
+
+    return "".join(result)
+
+
+def simplify_polyline(points: list, tolerance: float) -> list:
+    """Ramer-Douglas-Peucker: drops points which are closer than `tolerance` to the line between
+    their neighbours. First and last point are always kept."""
+    if tolerance <= 0 or len(points) < 3:
+        return points
+
+    start, end = points[0], points[-1]
+    max_dist, max_idx = -1.0, 0
+    for i in range(1, len(points) - 1):
+        dist = point_segment_distance(points[i], start, end)
+        if dist > max_dist:
+            max_dist, max_idx = dist, i
+
+    if max_dist <= tolerance:
+        return [start, end]
+
+    left = simplify_polyline(points[: max_idx + 1], tolerance)
+    right = simplify_polyline(points[max_idx:], tolerance)
+    return left[:-1] + right
+
+
+def minify_character(character_data: dict, precision: int, tolerance: float) -> dict:
+    result = dict(character_data)
+    result["strokes"] = [minify_path(p, precision) for p in character_data["strokes"]]
+    result["medians"] = [
+        simplify_polyline(
+            [[round_number(c, precision) for c in point] for point in median], tolerance
+        )
+        for median in character_data["medians"]
+    ]
+    return result
+
+
+def point_segment_distance(p: list, a: list, b: list) -> float:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return math.dist(p, a)
+
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_squared
+    t = max(0.0, min(1.0, t))
+    return math.dist(p, (a[0] + t * dx, a[1] + t * dy))
+
+
+def average_distance(points: list, median: list) -> float:
+    """Average distance of `points` to the polyline `median`, like `Stroke.getAverageDistance`."""
+    if len(median) == 1:
+        return sum(math.dist(p, median[0]) for p in points) / len(points)
+
+    total = 0.0
+    for p in points:
+        total += min(
+            point_segment_distance(p, median[i], median[i + 1])
+            for i in range(len(median) - 1)
+        )
+    return total / len(points)
+
+
+def resample_curve(curve: list, count: int = 30) -> list:
+    """Returns `count` points evenly spaced along `curve`, like `outlineCurve`."""
+    lengths = [0.0]
+    for a, b in zip(curve, curve[1:]):
+        lengths.append(lengths[-1] + math.dist(a, b))
+
+    total = lengths[-1]
+    if total == 0:
+        return [curve[0]] * count
+
+    result = []
+    segment = 0
+    for i in range(count):
+        target = total * i / (count - 1)
+        while segment < len(curve) - 2 and lengths[segment + 1] < target:
+            segment += 1
+        a, b = curve[segment], curve[segment + 1]
+        span = lengths[segment + 1] - lengths[segment]
+        t = (target - lengths[segment]) / span if span else 0.0
+        result.append((a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])))
+
+    return result
+
+
+def normalize_curve(curve: list) -> list:
+    """Resamples the curve, moves it to its centroid and scales it to unit size, like
+    `normalizeCurve`."""
+    curve = resample_curve(curve)
+    cx = sum(p[0] for p in curve) / len(curve)
+    cy = sum(p[1] for p in curve) / len(curve)
+    scale = math.sqrt(sum((p[0] - cx) ** 2 + (p[1] - cy) ** 2 for p in curve) / len(curve))
+    scale = scale or 1.0
+    return [((p[0] - cx) / scale, (p[1] - cy) / scale) for p in curve]
+
+
+def frechet_distance(curve1: list, curve2: list) -> float:
+    """Discrete Fréchet distance, like `frechetDist`."""
+    previous = []
+    for i, p in enumerate(curve1):
+        current = []
+        for j, q in enumerate(curve2):
+            dist = math.dist(p, q)
+            if i == 0 and j == 0:
+                current.append(dist)
+            elif i == 0:
+                current.append(max(current[j - 1], dist))
+            elif j == 0:
+                current.append(max(previous[0], dist))
+            else:
+                current.append(
+                    max(min(previous[j], previous[j - 1], current[j - 1]), dist)
+                )
+        previous = current
+    return previous[-1]
+
+
+def verify_character(original: dict, minified: dict) -> list:
+    """Returns the reasons why `minified` is graded differently than `original`, if any."""
+    if len(original["strokes"]) != len(minified["strokes"]) or len(
+        original["medians"]
+    ) != len(minified["medians"]):
+        return ["number of strokes changed"]
+
+    problems = []
+    for i, (a, b) in enumerate(zip(original["medians"], minified["medians"])):
+        start_end = max(math.dist(a[0], b[0]), math.dist(a[-1], b[-1]))
+        if start_end > START_AND_END_DIST_THRESHOLD * FIDELITY:
+            problems.append(f"stroke {i}: start/end moved by {start_end:.1f}")
+
+        avg_dist = average_distance(a, b)
+        if avg_dist > AVG_DIST_THRESHOLD * FIDELITY:
+            problems.append(f"stroke {i}: average distance {avg_dist:.1f}")
+
+        if len(a) > 1 and len(b) > 1:
+            shape = frechet_distance(normalize_curve(a), normalize_curve(b))
+            if shape > FRECHET_THRESHOLD * FIDELITY:
+                problems.append(f"stroke {i}: shape distance {shape:.3f}")
+
+    return problems
+
+
+def dumps(character_data: dict) -> str:
+    return json.dumps(character_data, separators=(",", ":"), ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=PATH_CHARACTERS)
+    parser.add_argument("--target", default=PATH_MINIFIED)
+    parser.add_argument("--precision", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=0.0)
+    parser.add_argument("--report", help="Write the size per character as CSV to this file")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.target) or ".", exist_ok=True)
+
+    sizes = []
+    failed = {}
+    with ZipFile(args.source, "r") as source, ZipFile(
+        args.target, "w", ZIP_DEFLATED
+    ) as target:
+        for info in source.infolist():
+            with source.open(info) as f:
+                raw = f.read()
+
+            if not (info.filename.startswith("data/") and info.filename.endswith(".json")):
+                target.writestr(info, raw)
+                continue
+
+            original = json.loads(raw.decode("utf-8"))
+            minified = minify_character(original, args.precision, args.tolerance)
+
+            problems = verify_character(original, minified)
+            if problems:
+                # Better ship the original than something that grades differently
+                failed[info.filename] = problems
+                minified = original
+
+            data = dumps(minified).encode("utf-8")
+            target.writestr(info.filename, data)
+            sizes.append((info.filename[len("data/") : -len(".json")], len(raw), len(data)))
+
+    if args.report:
+        with open(args.report, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["character", "original", "minified", "reduction"])
+            for character, before, after in sizes:
+                writer.writerow([character, before, after, f"{1 - after / before:.3f}"])
+
+    total_before = sum(e[1] for e in sizes)
+    total_after = sum(e[2] for e in sizes)
+    reductions = sorted(1 - after / before for _, before, after in sizes)
+
+    print(f"Minified {len(sizes)} characters, {len(failed)} kept as original")
+    for name, problems in failed.items():
+        print(f"  {name}: {', '.join(problems)}")
+
+    if sizes:
+        print(
+            f"JSON: {total_before} -> {total_after} bytes "
+            f"({1 - total_after / total_before:.1%} smaller)"
+        )
+        print(
+            f"Per character reduction: min {reductions[0]:.1%}, "
+            f"median {reductions[len(reductions) // 2]:.1%}, max {reductions[-1]:.1%}"
+        )
+    print(
+        f"Archive: {os.path.getsize(args.source)} -> {os.path.getsize(args.target)} bytes"
+    )
@@ -2,6 +2,8 @@ import glob
 import os
 from zipfile import ZipFile
 
+from build_variant_index import build_default_variant_index
+
 TARGET_FOLDER = "target"
 
 def copy_file_to_zip(myzip: ZipFile, source_path: str):
@@ -32,11 +34,17 @@ if __name__ == "__main__":
 
         copy_file_to_zip(myzip, os.path.join(maobi, "quiz.js"))
         
-        copy_file_to_zip(myzip, os.path.join(maobi, "characters.zip"))
+        # The character pack replaces the zip, see `scripts/build_character_pack.py`
+        if os.path.exists(os.path.join(maobi, "characters.pack")):
+            copy_file_to_zip(myzip, os.path.join(maobi, "characters.pack"))
+        else:
+            copy_file_to_zip(myzip, os.path.join(maobi, "characters.zip"))
         copy_file_to_zip(myzip, os.path.join(maobi, "hanzi-writer.min.js"))
 
-        copy_file_to_zip(myzip, os.path.join(maobi, "rice.svg"))
-        copy_file_to_zip(myzip, os.path.join(maobi, "field.svg"))
+        # Without the index, `variant_fallback` finds no variants, see `scripts/build_variant_index.py`
+        if not os.path.exists(os.path.join(maobi, "variants.bin")):
+            build_default_variant_index(os.path.join(maobi, "variants.bin"))
+        copy_file_to_zip(myzip, os.path.join(maobi, "variants.bin"))
 
         copy_file_to_zip(myzip, os.path.join(maobi, "config.json"))
         copy_file_to_zip(myzip, os.path.join(maobi, "config.md"))
@@ -0,0 +1,319 @@
+""" This script prints practice sheets for the characters of a deck or search in an Anki
+collection. Characters are taken from a field like the quiz does (see `tokenize_characters`),
+every distinct character once. For each character, a row shows it written out, then the
+stroke order stroke by stroke, then its outline to trace, all on the grids of the quiz.
+
+Pages are rendered by a pool of processes and written one file per page as soon as they are
+done, so memory does not grow with the size of the deck. PDF output needs `cairosvg`.
+
+Close Anki before, the collection is opened directly:
+
+    python scripts/print_worksheets.py --collection ~/.local/share/Anki2/User\\ 1/collection.anki2
+        --deck Chinese --field Hanzi [--grid field] [--format pdf] [--output target/worksheets]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from zipfile import ZipFile
+
+# Import the modules directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi")
+)
+
+from extract import tokenize_characters
+from grid import SIZE, GridStyle, build_grid_lines
+from pack import CharacterPack
+from variants import find_variant
+
+PATH_MAOBI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi"
+)
+
+PATH_CHARACTER_PACK = os.path.join(PATH_MAOBI, "characters.pack")
+PATH_CHARACTERS = os.path.join(PATH_MAOBI, "characters.zip")
+PATH_OVERLAY = os.path.join(PATH_MAOBI, "user_files", "characters")
+PATH_WORKSHEETS = os.path.join("target", "worksheets")
+
+# A4 in mm
+PAGE_WIDTH = 210
+PAGE_HEIGHT = 297
+MARGIN = 12
+HEADER = 6
+COLUMNS = 10
+
+# Grid lines are drawn darker than in the quiz to show up on paper, the border of a box in mm
+GRID_STYLE = GridStyle("rgb(170,170,170)", 0.6, 0)
+BORDER_WIDTH = 0.3
+
+COLOR_DONE = "rgb(60,60,60)"
+COLOR_CURRENT = "rgb(200,40,40)"
+COLOR_OUTLINE = "rgb(215,215,215)"
+
+# Pages rendered ahead per worker, bounds the memory of pages waiting to be written
+PAGES_AHEAD = 2
+
+PAGE_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+    'width="{width}mm" height="{height}mm" viewBox="0 0 {width} {height}">'
+    "<defs>{defs}</defs>{body}</svg>"
+)
+
+
+class CharacterSource:
+    """Reads stroke data like the character store of the add-on: the overlay first, then the
+    character pack or, if that is missing, the zip."""
+
+    def __init__(self):
+        if os.path.exists(PATH_CHARACTER_PACK):
+            self._pack = CharacterPack(PATH_CHARACTER_PACK)
+            self._zip = None
+        else:
+            self._pack = None
+            self._zip = ZipFile(PATH_CHARACTERS, "r")
+
+    def strokes(self, character: str):
+        """Returns the SVG paths of the strokes of `character` or `None` if there is no data."""
+        data = self._read(character)
+        return json.loads(data)["strokes"] if data is not None else None
+
+    def _read(self, character: str):
+        path = os.path.join(PATH_OVERLAY, character + ".json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+
+        if self._pack is not None:
+            return self._pack.get(character)
+
+        try:
+            return self._zip.read(f"data/{character}.json").decode("utf-8")
+        except KeyError:
+            return None
+
+
+def read_characters(collection_path: str, search: str, field_name: str) -> list:
+    """Returns the distinct characters in field `field_name` of the notes found by `search`, in
+    the order of the notes."""
+    from anki.collection import Collection
+
+    col = Collection(collection_path)
+    try:
+        characters = {}
+        for note_id in col.find_notes(search):
+            note = col.get_note(note_id)
+            if field_name not in note:
+                continue
+
+            found, _ = tokenize_characters(note[field_name])
+            characters.update(dict.fromkeys(found))
+    finally:
+        col.close()
+
+    return list(characters)
+
+
+def load_entries(characters: list, variant_fallback: bool):
+    """Yields (character, strokes) for every character with stroke data. Characters without are
+    replaced by a variant if `variant_fallback`, else reported and skipped."""
+    source = CharacterSource()
+
+    for c in characters:
+        strokes = source.strokes(c)
+        if strokes is None and variant_fallback:
+            variant = find_variant(c)
+            if variant is not None:
+                strokes = source.strokes(variant)
+
+        if strokes is None:
+            print(f"Skipping '{c}', there is no stroke data", file=sys.stderr)
+            continue
+
+        yield c, strokes
+
+
+def paginate(entries, rows_per_page: int, traces: int):
+    """Groups the `entries` into pages of at most `rows_per_page` rows. The rows of a character
+    are never split across pages."""
+    page = []
+    rows = 0
+    for entry in entries:
+        entry_rows = _rows(entry[1], traces)
+        if page and rows + entry_rows > rows_per_page:
+            yield page
+            page = []
+            rows = 0
+
+        page.append(entry)
+        rows += entry_rows
+
+    if page:
+        yield page
+
+
+def render_page(
+    entries: list, title: str, page_number: int, grid: str, traces: int
+) -> str:
+    """Renders the worksheet page with the characters and strokes in `entries` as SVG."""
+    cell = (PAGE_WIDTH - 2 * MARGIN) / COLUMNS
+    scale = cell / 1024
+
+    defs = [
+        f'<g id="grid">{build_grid_lines(grid, GRID_STYLE)}'
+        f'<rect width="{SIZE}" height="{SIZE}" fill="none" stroke="black" '
+        f'stroke-width="{BORDER_WIDTH * SIZE / cell:g}" /></g>'
+    ]
+    body = [
+        f'<text x="{MARGIN}" y="{MARGIN}" font-size="4" font-family="sans-serif">'
+        f"{_escape_xml(title)}</text>",
+        f'<text x="{PAGE_WIDTH - MARGIN}" y="{MARGIN}" font-size="4" '
+        f'font-family="sans-serif" text-anchor="end">{page_number}</text>',
+    ]
+
+    row = 0
+    for i, (character, strokes) in enumerate(entries):
+        # Every stroke is defined once and referenced by all boxes of the character
+        for j, stroke in enumerate(strokes):
+            defs.append(f'<path id="c{i}s{j}" d="{stroke}" />')
+        outline = "".join(
+            f'<use xlink:href="#c{i}s{j}" />' for j in range(len(strokes))
+        )
+        defs.append(f'<g id="c{i}">{outline}</g>')
+
+        boxes = [f'<use xlink:href="#c{i}" fill="{COLOR_DONE}" />']
+        for j in range(len(strokes)):
+            boxes.append(
+                f'<use xlink:href="#c{i}" fill="{COLOR_OUTLINE}" />'
+                + "".join(
+                    f'<use xlink:href="#c{i}s{k}" fill="{COLOR_DONE}" />'
+                    for k in range(j)
+                )
+                + f'<use xlink:href="#c{i}s{j}" fill="{COLOR_CURRENT}" />'
+            )
+        boxes += [f'<use xlink:href="#c{i}" fill="{COLOR_OUTLINE}" />'] * traces
+        boxes += [""] * (-len(boxes) % COLUMNS)
+
+        for k, content in enumerate(boxes):
+            x = MARGIN + (k % COLUMNS) * cell
+            y = MARGIN + HEADER + (row + k // COLUMNS) * cell
+            body.append(
+                f'<use xlink:href="#grid" transform="translate({x:g}, {y:g}) '
+                f'scale({cell / SIZE:g})" />'
+            )
+            if content:
+                # Hanzi Writer data uses a 1024x1024 box with the y axis pointing up
+                body.append(
+                    f'<g transform="translate({x:g}, {y + 900 * scale:g}) '
+                    f'scale({scale:g}, {-scale:g})">{content}</g>'
+                )
+
+        row += len(boxes) // COLUMNS
+
+    return PAGE_TEMPLATE.format(
+        width=PAGE_WIDTH, height=PAGE_HEIGHT, defs="".join(defs), body="".join(body)
+    )
+
+
+def write_page(
+    path: str, entries: list, title: str, page_number: int, grid: str, traces: int
+) -> str:
+    """Renders a page and writes it to `path`, as PDF if `path` ends with `.pdf`. Runs in a
+    worker process."""
+    svg = render_page(entries, title, page_number, grid, traces)
+
+    if path.endswith(".pdf"):
+        import cairosvg
+
+        cairosvg.svg2pdf(bytestring=svg.encode("utf-8"), write_to=path)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(svg)
+
+    return path
+
+
+def _rows(strokes: list, traces: int) -> int:
+    # The character, one box per stroke and the boxes to trace
+    return -(-(1 + len(strokes) + traces) // COLUMNS)
+
+
+def _escape_xml(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _escape_search(text: str) -> str:
+    """Escapes `text` to be used literally in a quoted Anki search term."""
+    for c in '\\"*_':
+        text = text.replace(c, "\\" + c)
+    return text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--collection", required=True, help="Path to collection.anki2")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--deck", help="Name of the deck, subdecks are included")
+    query.add_argument("--search", help="Anki search, e.g. 'deck:Chinese tag:lesson1'")
+    parser.add_argument("--field", required=True, help="Field with the characters")
+    parser.add_argument(
+        "--grid", default="rice", choices=["rice", "field", "hui", "nine", "none"]
+    )
+    parser.add_argument("--traces", type=int, default=3, help="Outlines to trace")
+    parser.add_argument("--format", default="svg", choices=["svg", "pdf"])
+    parser.add_argument("--output", default=PATH_WORKSHEETS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--no-variants",
+        action="store_true",
+        help="Skip characters without stroke data instead of printing a variant",
+    )
+    args = parser.parse_args()
+
+    if args.format == "pdf":
+        try:
+            import cairosvg  # noqa: F401
+        except ImportError:
+            parser.error("PDF output needs cairosvg: pip install cairosvg")
+
+    search = args.search or f'deck:"{_escape_search(args.deck)}"'
+    title = args.deck or args.search
+
+    characters = read_characters(args.collection, search, args.field)
+    print(f"Found {len(characters)} characters")
+
+    os.makedirs(args.output, exist_ok=True)
+    rows_per_page = int(
+        (PAGE_HEIGHT - 2 * MARGIN - HEADER) // ((PAGE_WIDTH - 2 * MARGIN) / COLUMNS)
+    )
+    pages = paginate(
+        load_entries(characters, not args.no_variants), rows_per_page, args.traces
+    )
+
+    # Only a few pages are submitted ahead, the rest is not even loaded yet
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        pending = deque()
+        for page_number, entries in enumerate(pages, start=1):
+            path = os.path.join(args.output, f"page-{page_number:04d}.{args.format}")
+            pending.append(
+                executor.submit(
+                    write_page,
+                    path,
+                    entries,
+                    title,
+                    page_number,
+                    args.grid,
+                    args.traces,
+                )
+            )
+
+            if len(pending) >= PAGES_AHEAD * args.workers:
+                print(f"Wrote {pending.popleft().result()}")
+
+        while pending:
+            print(f"Wrote {pending.popleft().result()}")
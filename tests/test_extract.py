@@ -0,0 +1,153 @@
+import os
+import sys
+
+import pytest
+
+# Import the extract module directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi"),
+)
+
+from extract import _tokenize, tokenize_characters
+
+
+def test_plain_text():
+    assert tokenize_characters("你好, world!") == (["你", "好"], [])
+
+
+def test_empty():
+    assert tokenize_characters("") == ([], [])
+    assert tokenize_characters("<br>") == ([], [])
+
+
+def test_colored():
+    html = (
+        '<span class="tone3">你</span><span class="tone3">好</span>'
+        '<span class="tone5">！</span>'
+    )
+    assert tokenize_characters(html) == (["你", "好"], ["tone3", "tone3"])
+
+
+def test_tone_class_among_other_classes():
+    html = "<span class='hanzi tone2 big'>茶</span>"
+    assert tokenize_characters(html) == (["茶"], ["tone2"])
+
+
+def test_tone_class_is_case_insensitive():
+    assert tokenize_characters('<SPAN CLASS="Tone2">茶</SPAN>') == (["茶"], ["tone2"])
+    assert tokenize_characters('<span class="TONE4">是</span>') == (["是"], ["tone4"])
+
+
+def test_nested_tone_spans():
+    html = '<span class="tone1"><span class="tone3">好</span>吃<b>的</b></span>'
+    assert tokenize_characters(html) == (
+        ["好", "吃", "的"],
+        ["tone3", "tone1", "tone1"],
+    )
+
+
+def test_markup_around_ideograph_in_tone_span():
+    html = '<span class="tone2"><b>茶</b></span><span class="tone4"><i><u>是</u></i></span>'
+    assert tokenize_characters(html) == (["茶", "是"], ["tone2", "tone4"])
+
+
+def test_markup_inside_tone_span():
+    html = '<div class="tone4"><b>是</b><br>是</div>'
+    assert tokenize_characters(html) == (["是", "是"], ["tone4", "tone4"])
+
+
+def test_unclosed_element_is_closed_by_parent():
+    html = '<div class="tone1"><span class="tone2">妈</div>妈'
+    assert tokenize_characters(html) == (["妈", "妈"], [])
+
+
+def test_tones_only_if_every_character_has_one():
+    html = '<span class="tone1">妈</span>妈'
+    assert tokenize_characters(html) == (["妈", "妈"], [])
+
+
+def test_tones_align_with_characters():
+    html = (
+        '<span class="tone2">学</span>，<span class="tone2">习</span>'
+        '&nbsp;<span class="tone1">中文</span>'
+    )
+    characters, tones = tokenize_characters(html)
+    assert characters == ["学", "习", "中", "文"]
+    assert tones == ["tone2", "tone2", "tone1", "tone1"]
+
+
+def test_entities():
+    assert tokenize_characters("&#20320;&nbsp;&#x597D;&amp;") == (["你", "好"], [])
+    assert tokenize_characters("<b>&#20320;</b>好") == (["你", "好"], [])
+    assert tokenize_characters('<span class="tone3">&#20320;</span>') == (
+        ["你"],
+        ["tone3"],
+    )
+
+
+def test_comments_scripts_and_styles_are_ignored():
+    html = (
+        "<!-- 注释 -->你"
+        "<script>var s = '脚本';</script>"
+        "<STYLE>.c:after { content: '样式' }</STYLE>好"
+    )
+    assert tokenize_characters(html) == (["你", "好"], [])
+
+
+def test_toned_spans_in_comments_are_ignored():
+    html = '<!-- <span class="tone1">妈</span> --><span class="tone3">马</span>'
+    assert tokenize_characters(html) == (["马"], ["tone3"])
+
+
+@pytest.mark.parametrize(
+    "character",
+    [
+        "〇",  # Ideographic number zero
+        "㐀",  # Extension A
+        "一",  # Unified ideographs
+        "\U00020000",  # Extension B
+        "\U0002a700",  # Extension C
+        "\U00030000",  # Extension G
+        "豈",  # Compatibility ideographs
+        "\U0002f800",  # Compatibility ideographs supplement
+    ],
+)
+def test_ideograph_blocks(character):
+    assert tokenize_characters(f"x{character}y") == ([character], [])
+    assert tokenize_characters(f'<span class="tone1">{character}</span>') == (
+        [character],
+        ["tone1"],
+    )
+
+
+def test_non_ideographs_are_ignored():
+    assert tokenize_characters("ㄅあア한，。1a") == ([], [])
+
+
+def test_lone_angle_bracket_is_text():
+    assert tokenize_characters("你 < 好") == (["你", "好"], [])
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "你好",
+        "<b>你</b>&nbsp;好",
+        '<span class="tone3">你</span><span class="tone3">好</span>',
+        '<span class="tone1">妈</span>妈',
+        '<span class="tone1"><b>妈</b></span>',
+        '<span class="x tone2 y">茶</span>&#x597D;',
+        '<SPAN CLASS="Tone2">茶</SPAN>',
+        '<div class="tone4">是<br/>是</div>',
+        '<span class="tone1"><b>妈</b></span><span class="tone3"><i><u>马</u></i></span>',
+        '<span class="tone1"><b>妈</span>',
+        '<span class="tone1"><span>妈</span>马</span>',
+        '<span class="tone1"><span class="tone3">妈</span></span>',
+        '<span class="tone1"><b class="Tone2">妈</b></span>',
+        '<span class="tone1"><b>妈</b> </span>',
+        '<span class="tone1"><b>妈</b></span ><b>马</b></span>',
+    ],
+)
+def test_fast_paths_match_tokenizer(html):
+    assert tokenize_characters(html) == _tokenize(html)
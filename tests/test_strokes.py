@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Import the strokes module directly, importing the `maobi` package needs Anki
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maobi"),
+)
+
+from strokes import StrokeLog
+
+
+@pytest.fixture
+def stroke_log(tmp_path):
+    stroke_log = StrokeLog(str(tmp_path / "strokes.sqlite"))
+    yield stroke_log
+    stroke_log.close()
+
+
+def test_error_rates(stroke_log):
+    stroke_log.add("你", 0, 0, False)
+    stroke_log.add("你", 1, 3, True)
+    stroke_log.add("好", 0, 0, False)
+
+    rates = stroke_log.error_rates()
+
+    assert rates["你"] == {
+        "strokes": 2,
+        "mistakes": 3,
+        "mistaken": 1,
+        "hints": 1,
+        "error_rate": 0.5,
+    }
+    assert rates["好"]["error_rate"] == 0
+    assert stroke_log.stroke_error_rates("你") == [0, 1]
+
+
+def test_given_up_strokes_count_as_mistaken(stroke_log):
+    stroke_log.add("好", 0, 2, False, accepted=False)
+    stroke_log.add("好", 0, 1, False)
+
+    assert stroke_log.error_rates()["好"]["mistakes"] == 3
+    assert stroke_log.stroke_error_rates("好") == [1]
+
+    with sqlite3.connect(stroke_log.path) as db:
+        rows = db.execute("select mistakes, accepted from strokes").fetchall()
+    assert rows == [(2, 0), (1, 1)]